@@ -6,19 +6,25 @@ from api.core import AcunetixCoreAPI
 from api.mixins.exports import ExportsMixin
 from api.mixins.reports import ReportMixin
 from api.mixins.scans import ScanMixin
+from api.mixins.target_configurations import TargetConfigurationMixin
 from api.mixins.targets import TargetMixin
+from api.mixins.vulnerabilities import VulnerabilityMixin
 from core.tools import timed_print
 
 
 class AcunetixAPI(AcunetixCoreAPI,
                   TargetMixin,
+                  TargetConfigurationMixin,
                   ScanMixin,
                   ReportMixin,
                   ExportsMixin,
+                  VulnerabilityMixin,
                   ABC):
 
-    def __init__(self, username: str, password: str, host: str, port: int, secure: bool):
-        super().__init__(username=username, password=password, host=host, port=port, secure=secure)
+    def __init__(self, username: str, password: str, host: str, port: int, secure: bool,
+                 rate_limit: float | None = None, endpoint_rate_limits: dict[str, float] | None = None):
+        super().__init__(username=username, password=password, host=host, port=port, secure=secure,
+                         rate_limit=rate_limit, endpoint_rate_limits=endpoint_rate_limits)
         self.test_connection()
         self._login()
         if not self.is_use_fake_client:
@@ -10,3 +10,8 @@ class AcunetixExportReport(AcunetixReport):
     @property
     def download_json_name(self) -> str:
         return self.download_json.split('/')[-1]
+
+    @property
+    def download_name(self) -> str:
+        """The name of the first downloadable file regardless of the export type."""
+        return self.download[0].split('/')[-1] if self.download else ''
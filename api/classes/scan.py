@@ -7,7 +7,7 @@ class AcunetixScanSession:
                  threat: int = 0,
                  progress: str = None,
                  scan_session_id: str = None,
-                 severity_counts: int = None,
+                 severity_counts: dict = None,
                  start_date: str = None,
                  event_level: int = 0):
         self.status = status
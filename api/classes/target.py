@@ -1,3 +1,8 @@
+from datetime import datetime, timezone
+
+from api.constants import TOOL_TARGET_TAG
+
+
 class AcunetixTarget:
     def __init__(self,
                  address: str,
@@ -20,3 +25,19 @@ class AcunetixTarget:
 
     def __str__(self) -> str:
         return f'{self.target_id} ({self.address})'
+
+    @staticmethod
+    def tool_description(created: datetime | None = None) -> str:
+        return f'{TOOL_TARGET_TAG} created={(created or datetime.now(timezone.utc)).isoformat()}'
+
+    @property
+    def tool_created_date(self) -> datetime | None:
+        """Creation date of the targets created by this tool, None for the other targets."""
+        tag, _, created = (self.description or '').partition(' created=')
+        if tag != TOOL_TARGET_TAG:
+            return None
+        try:
+            created = datetime.fromisoformat(created)
+        except ValueError:
+            return None
+        return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
@@ -0,0 +1,29 @@
+class AcunetixVulnerability:
+    def __init__(self,
+                 vuln_id: str,
+                 vt_id: str,
+                 vt_name: str,
+                 severity: int,
+                 affects_url: str,
+                 affects_detail: str = '',
+                 status: str = '',
+                 confidence: int = 0,
+                 details: str = '',
+                 description: str = '',
+                 request: str = '',
+                 response: str = ''):
+        self.vuln_id = vuln_id
+        self.vt_id = vt_id
+        self.vt_name = vt_name
+        self.severity = severity
+        self.affects_url = affects_url
+        self.affects_detail = affects_detail
+        self.status = status
+        self.confidence = confidence
+        self.details = details
+        self.description = description
+        self.request = request
+        self.response = response
+
+    def __str__(self) -> str:
+        return f'Vulnerability {self.vuln_id} ({self.vt_name})'
@@ -0,0 +1,191 @@
+import threading
+from typing import Iterable
+
+import requests
+
+from api import constants
+from api.base import AcunetixAPI
+from api.classes.scan import AcunetixScan
+from api.classes.scan_status import FINAL_ACUNETIX_STATUSES
+from api.classes.target import AcunetixTarget
+from core.tools import timed_print
+
+
+class AcunetixInstance:
+    def __init__(self, host: str, port: int, max_scans: int = 0):
+        self.host = host
+        self.port = port
+        self.max_scans = max_scans  # 0 - unlimited
+        self.api: AcunetixAPI | None = None
+        self.healthy = False
+        self.running_scans = 0
+
+    def __str__(self) -> str:
+        return self.key
+
+    @property
+    def key(self) -> str:
+        return f'{self.host}:{self.port}'
+
+    @property
+    def free_slots(self) -> int | None:
+        if not self.healthy:
+            return 0
+        if not self.max_scans:
+            return None
+        return max(self.max_scans - self.running_scans, 0)
+
+    @property
+    def load(self) -> float:
+        return self.running_scans / self.max_scans if self.max_scans else self.running_scans
+
+
+class AcunetixCluster:
+    """Several Acunetix instances used as one scanner.
+    New targets are placed on the least loaded healthy instance, an instance that stops responding
+    is skipped until refresh finds it alive again.
+    """
+
+    def __init__(self, username: str, password: str, instances: Iterable[str], secure: bool,
+                 max_scans_per_instance: int = 0, rate_limit: float | None = None,
+                 endpoint_rate_limits: dict[str, float] | None = None):
+        self.username = username
+        self.password = password
+        self.secure = secure
+        self.rate_limit = rate_limit
+        self.endpoint_rate_limits = endpoint_rate_limits
+        self.instances: dict[str, AcunetixInstance] = {}
+        self._lock = threading.Lock()
+        for address in instances:
+            host, port = self.split_address(address)
+            instance = AcunetixInstance(host=host, port=port, max_scans=max_scans_per_instance)
+            self.instances[instance.key] = instance
+            self.connect(instance)
+
+    @staticmethod
+    def split_address(address: str) -> tuple[str, int]:
+        host, _, port = address.rpartition(':')
+        return host, int(port)
+
+    @property
+    def healthy_instances(self) -> list[AcunetixInstance]:
+        return [instance for instance in self.instances.values() if instance.healthy]
+
+    @property
+    def running_scans(self) -> int:
+        return sum(instance.running_scans for instance in self.healthy_instances)
+
+    @property
+    def free_slots(self) -> int | None:
+        """Combined free slots of the healthy instances, None if any of them is unlimited."""
+        slots = [instance.free_slots for instance in self.healthy_instances]
+        return None if None in slots else sum(slots)
+
+    def connect(self, instance: AcunetixInstance) -> bool:
+        try:
+            instance.api = AcunetixAPI(username=self.username, password=self.password,
+                                       host=instance.host, port=instance.port, secure=self.secure,
+                                       rate_limit=self.rate_limit, endpoint_rate_limits=self.endpoint_rate_limits)
+        except requests.exceptions.RequestException as e:
+            timed_print(f'Instance {instance} is not available: {e}')
+            instance.healthy = False
+            return False
+        instance.healthy = True
+        self.update_running_scans(instance)
+        return True
+
+    def get(self, key: str | None = None) -> AcunetixAPI:
+        """API of the instance by key, the first instance if the key is not set."""
+        if key and key not in self.instances:
+            raise requests.exceptions.ConnectionError(f'Instance {key} is not in the cluster')
+        instance = self.instances[key] if key else next(iter(self.instances.values()))
+        if not instance.api:
+            raise requests.exceptions.ConnectionError(f'Instance {instance} is not connected')
+        return instance.api
+
+    def update_running_scans(self, instance: AcunetixInstance):
+        scans = instance.api.get_scans()
+        instance.running_scans = len([
+            scan for scan in scans if scan.current_session.status not in FINAL_ACUNETIX_STATUSES
+        ])
+
+    def mark_unhealthy(self, instance: AcunetixInstance):
+        instance.healthy = False
+        timed_print(f'Instance {instance} stopped responding. Fail over to the other instances.')
+
+    def refresh(self):
+        """Updates health and load of all instances."""
+        for instance in self.instances.values():
+            if not instance.api:
+                self.connect(instance)
+                continue
+            instance.healthy = instance.api.is_alive()
+            if instance.healthy:
+                try:
+                    self.update_running_scans(instance)
+                except requests.exceptions.RequestException:
+                    self.mark_unhealthy(instance)
+
+    def least_loaded(self, exclude: Iterable[str] = ()) -> AcunetixInstance | None:
+        with self._lock:
+            candidates = [
+                instance for instance in self.healthy_instances
+                if instance.key not in exclude and instance.free_slots != 0
+            ]
+            return min(candidates, key=lambda instance: instance.load) if candidates else None
+
+    def place(self, address: str, **kwargs) -> tuple[AcunetixInstance, AcunetixTarget]:
+        """Creates the target on the least loaded instance and reserves a scan slot there.
+
+        Args:
+            address: The target address [url, domain, etc.].
+            kwargs: The target additional information.
+
+        """
+
+        tried = set()
+        while instance := self.least_loaded(exclude=tried):
+            tried.add(instance.key)
+            if not instance.api.is_alive():
+                self.mark_unhealthy(instance)
+                continue
+            try:
+                target = instance.api.create_target(address, **kwargs)
+            except requests.exceptions.HTTPError as e:  # refused [licence limit, etc.], the instance itself works
+                timed_print(f'Instance {instance} did not create the target: {e}')
+                continue
+            except requests.exceptions.RequestException:
+                self.mark_unhealthy(instance)
+                continue
+            with self._lock:
+                instance.running_scans += 1
+            timed_print(f'{target} placed on the instance {instance}.')
+            return instance, target
+        raise requests.exceptions.ConnectionError(f'No instance is able to scan {address}')
+
+    def start_scan(self, instance: AcunetixInstance, target: AcunetixTarget,
+                   profile_id: str = constants.DEFAULT_PROFILE_ID,
+                   report_template_id: str = constants.DEFAULT_REPORT_TEMPLATE_ID) -> AcunetixScan:
+        """Starts the scan of the placed target, the reserved slot is freed if the scan can not be started."""
+        try:
+            return instance.api.run_scan(target_id=target.target_id, profile_id=profile_id,
+                                         report_template_id=report_template_id)
+        except requests.exceptions.HTTPError:  # refused, the instance itself works
+            self.release(instance.key)
+            raise
+        except requests.exceptions.RequestException:
+            self.release(instance.key)
+            self.mark_unhealthy(instance)
+            raise
+
+    def release(self, key: str):
+        """Frees the slot taken by place once the scan is finished."""
+        with self._lock:
+            instance = self.instances[key]
+            instance.running_scans = max(instance.running_scans - 1, 0)
+
+    def close_session(self):
+        for instance in self.instances.values():
+            if instance.api:
+                timed_print(f'Instance {instance} API client metrics: {instance.api.metrics.to_dict()}')
+                instance.api.close_session()
@@ -38,3 +38,6 @@ class ExportTypes(enum.Enum):
 
 DEFAULT_REPORT_TEMPLATE_ID = ReportTemplateIds.COMPREHENSIVE.value
 DEFAULT_PROFILE_ID = ProfileIds.FULL_SCAN.value
+
+# targets created by this tool are tagged with it in the description, see AcunetixTarget.tool_description
+TOOL_TARGET_TAG = 'acunetix_api'
@@ -6,12 +6,14 @@ from typing import NoReturn
 import requests
 import urllib3
 
+from api.rate_limit import ClientMetrics, RateLimiter, SingleFlight
 from core.tools import timed_print
 
 
 class AcunetixCoreAPI:
 
-    def __init__(self, username: str, password: str, host: str, port: int, secure: bool):
+    def __init__(self, username: str, password: str, host: str, port: int, secure: bool,
+                 rate_limit: float | None = None, endpoint_rate_limits: dict[str, float] | None = None):
         self.username = username
         self.password = password
         self.host = host
@@ -21,6 +23,11 @@ class AcunetixCoreAPI:
         self.session = self._init_session()
         self._fake_client: bool = False
         self._fake_uuid: str | None = None
+        self.rate_limiter = RateLimiter(rate=rate_limit, endpoint_rates=endpoint_rate_limits)
+        self.metrics = ClientMetrics()
+        self._single_flight = SingleFlight()
+        self._target_configurations: dict[str, dict] = {}
+        self._created_target_ids: set[str] = set()
 
     @property
     def headers_json(self) -> dict:
@@ -80,57 +87,46 @@ class AcunetixCoreAPI:
         if cookies:
             self.session.cookies.update(cookies)
 
-    def _get_request(self, path: str) -> requests.Response:
+    def _throttle(self, path: str):
+        self.metrics.add_request(delay=self.rate_limiter.acquire(path))
+
+    def _get_json(self, path: str, params: dict | None = None):
+        """GET with the parsed body. Identical requests made at the same time share one round-trip."""
+        key = (path, tuple(sorted((params or {}).items())))
+        content, shared = self._single_flight.do(key, lambda: self._get_request(path=path, params=params).json())
+        if shared:
+            self.metrics.add_coalesced_request()
+        return content
+
+    def _get_request(self, path: str, params: dict | None = None, stream: bool = False,
+                     timeout: float | None = None) -> requests.Response:
+        self._throttle(path)
         path = f'{self.api_url}{path}'
         if self.is_use_fake_client:
             path += f'?watcher_uuid={self._fake_uuid}'
-        return self.session.get(path)
+        return self.session.get(path, params=params, stream=stream, timeout=timeout)
 
     def _post_request(self, path: str, data) -> requests.Response:
+        self._throttle(path)
         path = f'{self.api_url}{path}'
         if self.is_use_fake_client:
             path += f'?watcher_uuid={self._fake_uuid}'
         return self.session.post(path, data=data)
 
     def _patch_request(self, path: str, data) -> requests.Response:
+        self._throttle(path)
         path = f'{self.api_url}{path}'
         if self.is_use_fake_client:
             path += f'?watcher_uuid={self._fake_uuid}'
         return self.session.patch(path, data=data)
 
     def _delete_request(self, path: str) -> requests.Response:
+        self._throttle(path)
         path = f'{self.api_url}{path}'
         if self.is_use_fake_client:
             path += f'?watcher_uuid={self._fake_uuid}'
         return self.session.delete(path)
 
-    def setup_proxy_configuration(self, target_id: str, host: str, port: int, protocol: str) -> NoReturn:
-        """Configures proxy settings for a target.
-
-        Args:
-            target_id: The target identifier.
-            host: The proxy hostname.
-            port: The proxy port.
-            protocol: The proxy connection protocol.
-
-        """
-
-        config_data = {
-            'proxy': {
-                'protocol': protocol or 'http',
-                'address': host,
-                'port': port or 8080,
-                'enabled': True
-            }
-        }
-        data = json.dumps(config_data)
-        resp = self._patch_request(path=f'targets/{target_id}/configuration', data=data)
-        if resp.status_code == 204:
-            timed_print('Proxy settings changed successfully.')
-        else:
-            timed_print(f'Proxy settings have not been changed. Something went wrong. {resp.text}')
-            exit(1)
-
     def test_connection(self) -> NoReturn:
         """Checking the connection to the Acunetix service. The service needs time to initialize.
         Attempts to establish a connection every 10 seconds, the maximum number of attempts is 100.
@@ -155,5 +151,13 @@ class AcunetixCoreAPI:
             timed_print('The connection to the Acunetix service has been successfully established.')
             break
 
+    def is_alive(self, timeout: float = 10) -> bool:
+        """Single connection attempt, unlike test_connection it neither waits nor raises."""
+        try:
+            self._get_request('', timeout=timeout)
+        except requests.exceptions.RequestException:
+            return False
+        return True
+
     def close_session(self):
         self.session.close()
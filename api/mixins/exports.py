@@ -1,7 +1,10 @@
 import json
+import threading
 from typing import TYPE_CHECKING
 
 from api.classes.export import AcunetixExportReport
+from api.classes.scan_status import FINAL_ACUNETIX_STATUSES
+from core.tools import timed_print
 
 if TYPE_CHECKING:
     from api.base import AcunetixAPI
@@ -25,10 +28,32 @@ class ExportsMixin:
         return self.parse_export(created_export=export.json())
 
     def get_export(self: "AcunetixAPI", export_id: str) -> AcunetixExportReport:
-        request = self._get_request(f'exports/{export_id}')
-        created_export = request.json()
+        created_export = self._get_json(f'exports/{export_id}')
         return self.parse_export(created_export=created_export)
 
+    def wait_for_export(self: "AcunetixAPI", export_id: str, interval: float = 2, max_interval: float = 30,
+                        expired: threading.Event | None = None) -> AcunetixExportReport:
+        """Polls the export until it reaches a final status.
+        Small exports are usually ready in a couple of seconds, so polling starts often
+        and the interval doubles up to max_interval for the big ones.
+        Once the expired event is set, the export is returned in its current status.
+        """
+
+        expired = expired or threading.Event()
+        while True:
+            export = self.get_export(export_id=export_id)
+            if export.status in FINAL_ACUNETIX_STATUSES:
+                timed_print(f'Export generated with status: {export.status.title()}.')
+                return export
+            timed_print(f'The current export status is: {export.status.title()}.')
+            if expired.wait(interval):
+                timed_print(f'Export {export_id} was not generated in time.')
+                return export
+            interval = min(interval * 2, max_interval)
+
+    def download_export(self: "AcunetixAPI", export: AcunetixExportReport, output_file: str) -> str:
+        return self.download_report_to_file(descriptor=export.download_name, output_file=output_file)
+
     @staticmethod
     def parse_export(created_export: dict) -> AcunetixExportReport:
         return AcunetixExportReport(
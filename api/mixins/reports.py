@@ -1,5 +1,5 @@
 import json
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 
 import requests
 
@@ -14,11 +14,10 @@ class ReportMixin:
     def get_reports(self: "AcunetixAPI", target_id: str = None) -> list[AcunetixReport]:
         """Get all available reports..."""
         path = 'reports'
-        response = self._get_request(path=path)
-        # timed_print(f'Get reports response {response.status_code}')
+        content = self._get_json(path=path)
         reports = [
             self.parse_report(created_report=report)
-            for report in response.json().get('reports')
+            for report in content.get('reports')
         ]
         if target_id:
             return list(filter(lambda report: (target_id in report.source.id_list), reports))
@@ -35,6 +34,25 @@ class ReportMixin:
         timed_print(f'Downloading report {descriptor}')
         return self._get_request(path=f'reports/download/{descriptor}')
 
+    def download_report_to_file(self: "AcunetixAPI", descriptor: str, output_file: str,
+                                chunk_size: int = 1024 * 1024) -> str:
+        """Streams the report to the file without keeping the whole body in memory.
+
+        Args:
+            descriptor: The report identifier.
+            output_file: The file path to save the report to.
+            chunk_size: The size of the chunks written to the file.
+
+        """
+
+        timed_print(f'Downloading report {descriptor} to {output_file}')
+        with self._get_request(path=f'reports/download/{descriptor}', stream=True) as response:
+            response.raise_for_status()
+            with open(output_file, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+        return output_file
+
     def run_scan_report(self: "AcunetixAPI", scan_id: str, template_id: str) -> AcunetixReport:
         data = {
             "template_id": template_id,
@@ -51,8 +69,7 @@ class ReportMixin:
         return self.parse_report(created_report=export.json())
 
     def get_report(self: "AcunetixAPI", report_id: str) -> AcunetixReport:
-        request = self._get_request(f'reports/{report_id}')
-        return self.parse_report(created_report=request.json())
+        return self.parse_report(created_report=self._get_json(f'reports/{report_id}'))
 
     @staticmethod
     def parse_report(created_report: dict) -> AcunetixReport:
@@ -67,7 +84,22 @@ class ReportMixin:
             source=created_report.get('source', []),
         )
 
-    def delete_report(self: "AcunetixAPI", report: AcunetixReport):
+    def iter_reports(self: "AcunetixAPI", limit: int = 100) -> Iterator[AcunetixReport]:
+        """Iterate over all reports page by page, get_reports returns only the first page."""
+        cursor = None
+        while True:
+            params = {'l': limit, 'c': cursor} if cursor else {'l': limit}
+            content = self._get_json(path='reports', params=params)
+            reports = content.get('reports', [])
+            yield from (self.parse_report(created_report=report) for report in reports)
+            cursor = content.get('pagination', {}).get('next_cursor')
+            if not cursor or not reports:
+                return
+
+    def delete_report(self: "AcunetixAPI", report: AcunetixReport) -> requests.Response | None:
+        return self.delete_report_by_id(report_id=report.report_id)
+
+    def delete_report_by_id(self: "AcunetixAPI", report_id: str) -> requests.Response | None:
         if self.is_use_fake_client:
-            return
-        self._delete_request(path=f'reports/{report.report_id}')
+            return None
+        return self._delete_request(path=f'reports/{report_id}')
@@ -1,5 +1,7 @@
 import json
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
+
+import requests
 
 from api import constants
 from api.classes.scan import AcunetixScan
@@ -12,12 +14,25 @@ class ScanMixin:
 
     def get_scans(self: "AcunetixAPI") -> list[AcunetixScan]:
         """Get all available scans..."""
-        request = self._get_request('scans')
-        return [self.parse_scan(created_scan=scan) for scan in request.json().get('scans', [])]
+        return [self.parse_scan(created_scan=scan) for scan in self._get_json('scans').get('scans', [])]
+
+    def iter_scans(self: "AcunetixAPI", limit: int = 100) -> Iterator[AcunetixScan]:
+        """Iterate over all scans page by page, get_scans returns only the first page."""
+        cursor = None
+        while True:
+            params = {'l': limit, 'c': cursor} if cursor else {'l': limit}
+            content = self._get_json('scans', params=params)
+            scans = content.get('scans', [])
+            yield from (self.parse_scan(created_scan=scan) for scan in scans)
+            cursor = content.get('pagination', {}).get('next_cursor')
+            if not cursor or not scans:
+                return
 
     def get_scan(self: "AcunetixAPI", scan_id: str) -> AcunetixScan:
-        request = self._get_request(f'scans/{scan_id}')
-        return self.parse_scan(created_scan=request.json())
+        return self.parse_scan(created_scan=self._get_json(f'scans/{scan_id}'))
+
+    def abort_scan(self: "AcunetixAPI", scan_id: str) -> requests.Response:
+        return self._post_request(path=f'scans/{scan_id}/abort', data=None)
 
     @staticmethod
     def parse_scan(created_scan: dict) -> AcunetixScan:
@@ -53,6 +68,9 @@ class ScanMixin:
             }
         }
         data = json.dumps(scan_data)
-        request = self._post_request(path='scans', data=data)
-        created_scan = request.json()
-        return self.parse_scan(created_scan=created_scan)
+        response = self._post_request(path='scans', data=data)
+        if not response.ok:
+            raise requests.exceptions.HTTPError(f'Fail to start the scan of the target: {target_id}. '
+                                                f'Status code: {response.status_code}. Info: {response.text}',
+                                                response=response)
+        return self.parse_scan(created_scan=response.json())
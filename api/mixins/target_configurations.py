@@ -0,0 +1,121 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import requests
+
+from core.tools import timed_print
+
+if TYPE_CHECKING:
+    from api.base import AcunetixAPI
+
+
+def configuration_matches(current: dict, expected: dict) -> bool:
+    """True when every value of the expected configuration is already set, other settings are ignored."""
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            if not isinstance(current.get(key), dict) or not configuration_matches(current[key], value):
+                return False
+        elif current.get(key) != value:
+            return False
+    return True
+
+
+def merge_configuration(current: dict, changes: dict) -> dict:
+    merged = dict(current)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_configuration(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class TargetConfigurationMixin:
+
+    @staticmethod
+    def proxy_configuration(host: str, port: int | None, protocol: str | None) -> dict:
+        return {
+            'proxy': {
+                'protocol': protocol or 'http',
+                'address': host,
+                'port': port or 8080,
+                'enabled': True
+            }
+        }
+
+    def get_target_configuration(self: "AcunetixAPI", target_id: str, use_cache: bool = True) -> dict:
+        """Get the target configuration, it is read once and then kept up to date by set_target_configuration.
+
+        Args:
+            target_id: The target identifier.
+            use_cache: False to read the configuration from the service again.
+
+        """
+
+        if use_cache and (configuration := self._target_configurations.get(target_id)) is not None:
+            return configuration
+        configuration = self._get_json(path=f'targets/{target_id}/configuration')
+        self._target_configurations[target_id] = configuration
+        return configuration
+
+    def set_target_configuration(self: "AcunetixAPI", target_id: str, configuration: dict) -> requests.Response:
+        resp = self._patch_request(path=f'targets/{target_id}/configuration', data=json.dumps(configuration))
+        if resp.status_code == 204:
+            cached = self._target_configurations.get(target_id)
+            if cached is not None:
+                self._target_configurations[target_id] = merge_configuration(cached, configuration)
+        else:
+            self._target_configurations.pop(target_id, None)
+        return resp
+
+    def configure_target(self: "AcunetixAPI", target_id: str, configuration: dict) -> str | None:
+        """Applies the configuration unless the target already has it. Returns the error or None."""
+        try:
+            # a target created by this client still has the defaults, reading them first is a wasted round-trip
+            is_created = target_id in self._created_target_ids
+            if not is_created and configuration_matches(self.get_target_configuration(target_id=target_id),
+                                                         configuration):
+                return None
+            resp = self.set_target_configuration(target_id=target_id, configuration=configuration)
+        except (requests.RequestException, json.decoder.JSONDecodeError) as e:
+            return str(e)
+        if resp.status_code != 204:
+            return f'Status code: {resp.status_code}. {resp.text}'
+        return None
+
+    def configure_targets(self: "AcunetixAPI", target_ids: list[str], configuration: dict,
+                          max_workers: int = 8) -> dict[str, str]:
+        """Applies one configuration to many targets at once.
+
+        Args:
+            target_ids: The target identifiers.
+            configuration: The configuration template, only the given settings are changed.
+            max_workers: The amount of simultaneous requests.
+
+        Returns:
+            The error of every target which configuration has not been changed.
+
+        """
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda target_id: self.configure_target(target_id, configuration), target_ids)
+            errors = {target_id: error for target_id, error in zip(target_ids, results) if error}
+        timed_print(f'Configured {len(target_ids) - len(errors)} of {len(target_ids)} target(s)')
+        return errors
+
+    def setup_proxy_configuration(self: "AcunetixAPI", target_id: str, host: str, port: int | None,
+                                  protocol: str | None) -> str | None:
+        """Configures proxy settings for a target. Returns the error or None.
+
+        Args:
+            target_id: The target identifier.
+            host: The proxy hostname.
+            port: The proxy port.
+            protocol: The proxy connection protocol.
+
+        """
+
+        errors = self.configure_targets(target_ids=[target_id],
+                                        configuration=self.proxy_configuration(host=host, port=port, protocol=protocol))
+        return errors.get(target_id)
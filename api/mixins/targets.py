@@ -1,6 +1,8 @@
 import json
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
+
+import requests
 
 from api.classes.target import AcunetixTarget
 from core.tools import timed_print
@@ -12,7 +14,7 @@ if TYPE_CHECKING:
 class TargetMixin:
 
     def create_target(self: "AcunetixAPI", address, **kwargs) -> AcunetixTarget:
-        """Create target for scanning process.
+        """Create target for scanning process, HTTPError is raised when the service refuses it [licence limit, etc.].
         Args:
             address: The target address [url, domain, etc.].
             kwargs: The target additional information.
@@ -20,7 +22,7 @@ class TargetMixin:
 
         target_data = {
             'address': address,
-            'description': kwargs.get('description') or '',
+            'description': kwargs.get('description') or AcunetixTarget.tool_description(),
             'type': kwargs.get('type') or 'default',
             'criticality': kwargs.get('criticality') or 10  # integer
         }
@@ -38,23 +40,32 @@ class TargetMixin:
         else:
             response = self._post_request(path='targets', data=data)
             if response.status_code != 201:
-                timed_print(f'Fail to create target for the address: {address}.\n'
-                            f'Info: {response.text} Status code: {response.status_code}. Content: {response.content}'
-                            f'\nExit')
-                self.close_session()
-                exit(1)
+                raise requests.exceptions.HTTPError(f'Fail to create target for the address: {address}. '
+                                                    f'Status code: {response.status_code}. Info: {response.text}',
+                                                    response=response)
         target = self.parse_target(target_dict=response.json())
+        self._created_target_ids.add(target.target_id)
         timed_print(f'Target {target} for the address: {address} has been successfully created.')
         return target
 
     def get_targets(self: "AcunetixAPI") -> list[AcunetixTarget]:
-        response = self._get_request(path='targets')
-        targets = response.json().get('targets', [])
+        targets = self._get_json(path='targets').get('targets', [])
         return [self.parse_target(target_dict=target) for target in targets]
 
+    def iter_targets(self: "AcunetixAPI", limit: int = 100) -> Iterator[AcunetixTarget]:
+        """Iterate over all targets page by page, get_targets returns only the first page."""
+        cursor = None
+        while True:
+            params = {'l': limit, 'c': cursor} if cursor else {'l': limit}
+            content = self._get_json(path='targets', params=params)
+            targets = content.get('targets', [])
+            yield from (self.parse_target(target_dict=target) for target in targets)
+            cursor = content.get('pagination', {}).get('next_cursor')
+            if not cursor or not targets:
+                return
+
     def get_target(self: "AcunetixAPI", target_id: str) -> AcunetixTarget:
-        response = self._get_request(path=f'targets/{target_id}')
-        return self.parse_target(target_dict=response.json())
+        return self.parse_target(target_dict=self._get_json(path=f'targets/{target_id}'))
 
     @staticmethod
     def parse_target(target_dict: dict) -> AcunetixTarget:
@@ -69,5 +80,8 @@ class TargetMixin:
             criticality=target_dict.get('criticality', 10),
         )
 
-    def delete_target(self: "AcunetixAPI", target: AcunetixTarget):
-        self._delete_request(path=f'targets/{target.target_id}')
+    def delete_target(self: "AcunetixAPI", target: AcunetixTarget) -> requests.Response:
+        return self.delete_target_by_id(target_id=target.target_id)
+
+    def delete_target_by_id(self: "AcunetixAPI", target_id: str) -> requests.Response:
+        return self._delete_request(path=f'targets/{target_id}')
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator
+
+from api.classes.vulnerability import AcunetixVulnerability
+
+if TYPE_CHECKING:
+    from api.base import AcunetixAPI
+
+
+class VulnerabilityMixin:
+
+    def get_scan_vulnerabilities_page(self: "AcunetixAPI", scan_id: str, result_id: str,
+                                      cursor: str | None = None, limit: int = 100,
+                                      sort: str | None = None) -> tuple[list[AcunetixVulnerability], str | None]:
+        """Get one page of the vulnerabilities found by the scan session.
+
+        Args:
+            scan_id: The scan identifier.
+            result_id: The scan session identifier.
+            cursor: The cursor of the page, None for the first one.
+            limit: The page size.
+            sort: The sort order [last_seen:desc], the service default if not set.
+
+        """
+
+        params = {'l': limit}
+        if cursor:
+            params['c'] = cursor
+        if sort:
+            params['s'] = sort
+        content = self._get_json(path=f'scans/{scan_id}/results/{result_id}/vulnerabilities', params=params)
+        vulnerabilities = [
+            self.parse_vulnerability(created_vulnerability=vulnerability)
+            for vulnerability in content.get('vulnerabilities', [])
+        ]
+        return vulnerabilities, content.get('pagination', {}).get('next_cursor')
+
+    def iter_scan_vulnerabilities(self: "AcunetixAPI", scan_id: str, result_id: str, limit: int = 100,
+                                  sort: str | None = None) -> Iterator[AcunetixVulnerability]:
+        """Iterate over all vulnerabilities of the scan session page by page.
+        Pages are requested lazily, so a consumer that stops early does not fetch the rest.
+        """
+        cursor = None
+        while True:
+            vulnerabilities, cursor = self.get_scan_vulnerabilities_page(scan_id=scan_id, result_id=result_id,
+                                                                         cursor=cursor, limit=limit, sort=sort)
+            yield from vulnerabilities
+            if not cursor or not vulnerabilities:
+                return
+
+    def get_scan_vulnerability(self: "AcunetixAPI", scan_id: str, result_id: str, vuln_id: str,
+                               with_response: bool = True) -> AcunetixVulnerability:
+        path = f'scans/{scan_id}/results/{result_id}/vulnerabilities/{vuln_id}'
+        vulnerability = self.parse_vulnerability(created_vulnerability=self._get_json(path=path))
+        if with_response:
+            vulnerability.response = self._get_request(path=f'{path}/http_response').text
+        return vulnerability
+
+    def get_scan_vulnerabilities_details(self: "AcunetixAPI", scan_id: str, result_id: str,
+                                         vulnerabilities: list[AcunetixVulnerability],
+                                         max_workers: int = 8) -> list[AcunetixVulnerability]:
+        """Fetch details of the vulnerabilities concurrently, keeping the original order.
+
+        Args:
+            scan_id: The scan identifier.
+            result_id: The scan session identifier.
+            vulnerabilities: The vulnerabilities from the list endpoint.
+            max_workers: The maximum amount of simultaneous requests to the API.
+
+        """
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda vulnerability: self.get_scan_vulnerability(scan_id=scan_id, result_id=result_id,
+                                                                  vuln_id=vulnerability.vuln_id),
+                vulnerabilities,
+            ))
+
+    @staticmethod
+    def parse_vulnerability(created_vulnerability: dict) -> AcunetixVulnerability:
+        return AcunetixVulnerability(
+            vuln_id=created_vulnerability['vuln_id'],
+            vt_id=created_vulnerability.get('vt_id', ''),
+            vt_name=created_vulnerability.get('vt_name', ''),
+            severity=created_vulnerability.get('severity', 0),
+            affects_url=created_vulnerability.get('affects_url', ''),
+            affects_detail=created_vulnerability.get('affects_detail', ''),
+            status=created_vulnerability.get('status', ''),
+            confidence=created_vulnerability.get('confidence', 0),
+            details=created_vulnerability.get('details', ''),
+            description=created_vulnerability.get('description', ''),
+            request=created_vulnerability.get('request', ''),
+        )
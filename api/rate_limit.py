@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        Args:
+            rate: The amount of requests per second.
+            capacity: The maximum burst, equals to the rate (one second of requests) by default.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class RateLimiter:
+    """Global and per-endpoint token buckets. The endpoint is the first part of the API path [scans, reports...]."""
+
+    def __init__(self, rate: float | None = None, endpoint_rates: dict[str, float] | None = None):
+        self.bucket = TokenBucket(rate) if rate else None
+        self.endpoint_buckets = {endpoint: TokenBucket(rate) for endpoint, rate in (endpoint_rates or {}).items()}
+
+    @staticmethod
+    def endpoint(path: str) -> str:
+        return path.strip('/').split('/')[0]
+
+    def acquire(self, path: str) -> float:
+        delay = 0
+        if endpoint_bucket := self.endpoint_buckets.get(self.endpoint(path)):
+            delay += endpoint_bucket.acquire()
+        if self.bucket:
+            delay += self.bucket.acquire()
+        return delay
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution and its result."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable) -> tuple[object, bool]:
+        """Returns the result and whether it was shared with another caller."""
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._calls[key] = Future()
+        if not is_leader:
+            return future.result(), True
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result(), False
+
+
+class ClientMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.throttled_requests = 0
+        self.throttle_delay = 0.0
+        self.coalesced_requests = 0
+        self._lock = threading.Lock()
+
+    def add_request(self, delay: float):
+        with self._lock:
+            self.requests += 1
+            if delay:
+                self.throttled_requests += 1
+                self.throttle_delay += delay
+
+    def add_coalesced_request(self):
+        with self._lock:
+            self.coalesced_requests += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'throttled_requests': self.throttled_requests,
+            'throttle_delay': self.throttle_delay,
+            'coalesced_requests': self.coalesced_requests,
+        }
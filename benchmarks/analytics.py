@@ -0,0 +1,147 @@
+"""Compares the vectorized statistics with Python loops over the issue dicts on synthetic issues.
+
+The statistics alone are measured on issues already in memory. End to end, the issues are first written to
+audit_result files and both implementations read them back, the vectorized one with load_results.
+
+    python -m benchmarks.analytics --issues 1000000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+from core import analytics
+from core.audit_result import Severity, init_issue, init_store, save_store
+from core.report_writers import iter_result_issues, read_scan_metrics
+
+
+def synthetic_columns(issues: int, targets: int, names: int, days: int, seed: int = 0) -> analytics.IssueColumns:
+    generator = np.random.default_rng(seed)
+    start = int(time.time()) - days * 24 * 3600
+    return analytics.IssueColumns(
+        severity=generator.choice(4, size=issues, p=[0.4, 0.3, 0.2, 0.1]).astype(np.int8),
+        target=generator.integers(0, targets, size=issues, dtype=np.int32),
+        name=generator.zipf(1.5, size=issues).clip(max=names).astype(np.int32) - 1,
+        timestamp=generator.integers(start, start + days * 24 * 3600, size=issues, dtype=np.int64),
+        targets=[f'https://target-{index}.example' for index in range(targets)],
+        names=[f'Vulnerability {index}' for index in range(names)],
+    )
+
+
+def to_dicts(columns: analytics.IssueColumns) -> list[dict]:
+    return [
+        {'severity': severity, 'target': columns.targets[target], 'name': columns.names[name], 'timestamp': timestamp}
+        for severity, target, name, timestamp in zip(columns.severity.tolist(), columns.target.tolist(),
+                                                     columns.name.tolist(), columns.timestamp.tolist())
+    ]
+
+
+def write_results(columns: analytics.IssueColumns, directory: str, files: int) -> list[str]:
+    """Splits the issues into audit_result files, every file is one result of one target and date."""
+    result_files = []
+    for index, chunk in enumerate(np.array_split(np.arange(len(columns)), files)):
+        if not len(chunk):
+            continue
+        store = init_store()
+        store['audit_result']['scan_metrics'].update({
+            'target': columns.targets[columns.target[chunk[0]]],
+            'scan_date': datetime.fromtimestamp(int(columns.timestamp[chunk[0]]), tz=timezone.utc).isoformat(),
+        })
+        store['audit_result']['issues'] = [
+            init_issue(severity=severity, name=columns.names[name], url='https://target.example/', description='')
+            for severity, name in zip(columns.severity[chunk].tolist(), columns.name[chunk].tolist())
+        ]
+        result_file = os.path.join(directory, f'{index}_audit_result.json')
+        save_store(store=store, output_file=result_file)
+        result_files.append(result_file)
+    return result_files
+
+
+def load_dicts(result_files: list[str]) -> list[dict]:
+    """The loop counterpart of load_results, the same streaming reader builds a dict per issue."""
+    issues = []
+    for result_file in result_files:
+        scan_metrics = read_scan_metrics(result_file)
+        timestamp = analytics.result_timestamp(result_file, scan_metrics)
+        issues.extend(
+            {'severity': issue['severity'], 'target': scan_metrics.get('target'), 'name': issue.get('name', ''),
+             'timestamp': timestamp}
+            for issue in iter_result_issues(result_file)
+        )
+    return issues
+
+
+def loop_statistics(issues: list[dict], top: int) -> dict:
+    severity, by_target, by_name, by_day = Counter(), {}, Counter(), {}
+    for issue in issues:
+        severity[issue['severity']] += 1
+        by_target.setdefault(issue['target'], Counter())[issue['severity']] += 1
+        by_name[issue['name']] += 1
+        by_day.setdefault(issue['timestamp'] // (24 * 3600), Counter())[issue['severity']] += 1
+    return {
+        'severity': {level.name: severity[level.value] for level in Severity},
+        'top_vulnerabilities': by_name.most_common(top),
+        'targets': len(by_target),
+        'trend': len(by_day),
+    }
+
+
+def vectorized_statistics(columns: analytics.IssueColumns, top: int) -> dict:
+    return {
+        'severity': analytics.severity_histogram(columns),
+        'top_vulnerabilities': analytics.top_vulnerability_types(columns, top=top),
+        'targets': len(analytics.severity_histogram_by_target(columns)),
+        'trend': len(analytics.severity_trend(columns)),
+    }
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--issues', type=int, default=1_000_000, help='Amount of synthetic issues')
+    parser.add_argument('--targets', type=int, default=1000, help='Amount of distinct targets')
+    parser.add_argument('--names', type=int, default=500, help='Amount of distinct vulnerability names')
+    parser.add_argument('--days', type=int, default=365, help='Time span of the results')
+    parser.add_argument('--top', type=int, default=10, help='Amount of top vulnerability types')
+    parser.add_argument('--files', type=int, default=100, help='Amount of audit_result files the issues are split into')
+    parser.add_argument('--repeat', type=int, default=3, help='Amount of runs per implementation')
+    arguments = parser.parse_args()
+    columns = synthetic_columns(issues=arguments.issues, targets=arguments.targets, names=arguments.names,
+                                days=arguments.days)
+    issues = to_dicts(columns)
+    loop = loop_statistics(issues, arguments.top)
+    vectorized = vectorized_statistics(columns, arguments.top)
+    if loop['severity'] != vectorized['severity'] or loop['trend'] != vectorized['trend']:
+        raise SystemExit(f'Results differ: {loop} {vectorized}')
+    loop_seconds = best_time(lambda: loop_statistics(issues, arguments.top), arguments.repeat)
+    vectorized_seconds = best_time(lambda: vectorized_statistics(columns, arguments.top), arguments.repeat)
+    print(f'{arguments.issues} issues in memory, best of {arguments.repeat}: loops {loop_seconds:.3f} s, '
+          f'vectorized {vectorized_seconds:.3f} s, {loop_seconds / vectorized_seconds:.1f}x faster')
+    directory = tempfile.mkdtemp()
+    try:
+        result_files = write_results(columns, directory=directory, files=arguments.files)
+        loop_seconds = best_time(lambda: loop_statistics(load_dicts(result_files), arguments.top), arguments.repeat)
+        load_seconds = best_time(lambda: analytics.load_results(result_files), arguments.repeat)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    total_seconds = load_seconds + vectorized_seconds
+    print(f'{arguments.issues} issues in {len(result_files)} files, end to end: loops {loop_seconds:.3f} s, '
+          f'vectorized {total_seconds:.3f} s [load_results {load_seconds:.3f} s], '
+          f'{loop_seconds / total_seconds:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
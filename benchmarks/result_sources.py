@@ -0,0 +1,49 @@
+"""Compares the HTML report path with the JSON export path for the same scan.
+
+    python -m benchmarks.result_sources --html report.html --json export.json
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from core import report_html_parser, report_json_parser
+
+
+def measure(name: str, parse, file_absolute_path: str) -> dict:
+    output_file = os.path.join(tempfile.mkdtemp(), f'{name}.json')
+    tracemalloc.start()
+    started = time.perf_counter()
+    parse(file_absolute_path=os.path.abspath(file_absolute_path), output_file=output_file)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'source': name,
+        'input_mb': os.path.getsize(file_absolute_path) / 1024 / 1024,
+        'seconds': elapsed,
+        'peak_python_mb': peak / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--html', type=str, help='Downloaded HTML report')
+    parser.add_argument('--json', type=str, help='Downloaded JSON export of the same scan')
+    parser.add_argument('--repeat', type=int, default=3, help='Amount of runs per source')
+    arguments = parser.parse_args()
+    sources = []
+    if arguments.html:
+        sources.append(('html', report_html_parser.parse_html, arguments.html))
+    if arguments.json:
+        sources.append(('json', report_json_parser.parse_json, arguments.json))
+    for name, parse, file_absolute_path in sources:
+        runs = [measure(name, parse, file_absolute_path) for _ in range(arguments.repeat)]
+        best = min(runs, key=lambda run: run['seconds'])
+        print(f"{name}: input {best['input_mb']:.2f} MB, best of {arguments.repeat}: {best['seconds']:.3f} s, "
+              f"peak python memory {best['peak_python_mb']:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,168 @@
 import argparse
 
+from api.constants import ProfileIds, ReportTemplateIds
+from core.report_writers import WRITERS
+from core.scan_matrix import MATRIX_MODES
 
-def init_args():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-a', '--address', type=str, help='address [url: http://donki.xyz/ or domain: donki.xyz]')
+
+def enum_list(enum_class):
+    def parse(value: str) -> list:
+        try:
+            return [enum_class[item.strip().upper()] for item in value.split(',') if item.strip()]
+        except KeyError as e:
+            raise argparse.ArgumentTypeError(f'Unknown {enum_class.__name__} name: {e}. '
+                                             f'Available: {", ".join(item.name for item in enum_class)}')
+
+    return parse
+
+
+def output_formats(value: str) -> list[str]:
+    formats = [item.strip().lower() for item in value.split(',') if item.strip()]
+    if unknown := [item for item in formats if item not in WRITERS]:
+        raise argparse.ArgumentTypeError(f'Unknown format: {", ".join(unknown)}. Available: {", ".join(WRITERS)}')
+    return formats
+
+
+def endpoint_rate_limit(value: str) -> tuple[str, float]:
+    endpoint, _, rate = value.partition('=')
+    try:
+        return endpoint, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Expected endpoint=rate, got: {value}')
+
+
+def add_connection_arguments(parser: argparse.ArgumentParser):
     parser.add_argument('-u', '--username', type=str, help='Acunetix user name')
     parser.add_argument('-p', '--password', type=str, help='Acunetix user password')
     parser.add_argument('-ht', '--host', type=str, help='Acunetix API host')
     parser.add_argument('-pt', '--port', type=int, help='Acunetix API port')
-    parser.add_argument('-o', '--output-file', type=str, default='report.json', help='Output file')
     parser.add_argument('-s', '--secure', type=bool, default=False, help='Session is secure')
+    parser.add_argument('-rl', '--rate-limit', type=float, default=None,
+                        help='Maximum amount of API requests per second')
+    parser.add_argument('-erl', '--endpoint-rate-limit', type=endpoint_rate_limit, action='append', default=[],
+                        help='Maximum amount of API requests per second for the endpoint [scans=2]. Can be repeated')
+
+
+def add_formats_argument(parser: argparse.ArgumentParser):
+    parser.add_argument('-f', '--formats', type=output_formats, default=[],
+                        help='Comma separated formats the audit result is also converted to [sarif,junit,csv,jsonl]')
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory of the downloaded reports and parse results cache')
+    parser.add_argument('--cache-size', type=int, default=1024, help='Maximum size of the cache in MB')
+
+
+def add_cluster_arguments(parser: argparse.ArgumentParser):
+    add_connection_arguments(parser)
+    parser.add_argument('-in', '--instances', type=str, default=None,
+                        help='Comma separated Acunetix instances [host:port,host:port] used instead of host and port')
+    parser.add_argument('--max-scans', type=int, default=0,
+                        help='Maximum amount of simultaneous scans per instance [0 - unlimited]')
+
+
+def add_stage_io_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('-i', '--input', type=str, default=None,
+                        help='JSON produced by the previous stage [file path or "-" for stdin]')
+    parser.add_argument('-o', '--output-file', type=str, default='-',
+                        help='JSON for the next stage [file path or "-" for stdout]')
+
+
+def add_result_source_argument(parser: argparse.ArgumentParser):
+    parser.add_argument('-rs', '--result-source', type=str, default='report',
+                        choices=['report', 'export', 'vulnerabilities', 'live'],
+                        help='Get results from the HTML report, the JSON export or the vulnerabilities API. '
+                             'live harvests vulnerabilities while the scan is still running')
+    parser.add_argument('-e', '--with-evidence', type=bool, default=False,
+                        help='Fetch details, request and response of every vulnerability '
+                             '[vulnerabilities and live result sources only]')
+
+
+def add_timeout_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--queued-timeout', type=float, default=60,
+                        help='Abort a scan waiting in the queue longer than this amount of minutes [0 - unlimited]')
+    parser.add_argument('--scan-timeout', type=float, default=0,
+                        help='Abort a scan without max_scan_time running longer than this amount of minutes '
+                             '[0 - unlimited]')
+    parser.add_argument('--report-timeout', type=float, default=30,
+                        help='Give up on a report or an export generated longer than this amount of minutes '
+                             '[0 - unlimited]')
+    parser.add_argument('--abort-retries', type=int, default=3, help='Attempts to abort a scan after its deadline')
+
+
+def init_stage_parsers(parser: argparse.ArgumentParser):
+    subparsers = parser.add_subparsers(dest='command', help='Run a single pipeline stage')
+
+    submit = subparsers.add_parser('submit', help='Create targets and start scans, emit job IDs')
+    add_cluster_arguments(submit)
+    add_stage_io_arguments(submit)
+    submit.add_argument('-a', '--address', type=str, action='append', default=[],
+                        help='address [url: http://donki.xyz/ or domain: donki.xyz]. Can be repeated')
+    submit.add_argument('-px', '--proxy', required=False, type=str, help='Proxy settings')
+
+    wait = subparsers.add_parser('wait', help='Poll the submitted scans until they are finished')
+    add_cluster_arguments(wait)
+    add_stage_io_arguments(wait)
+    wait.add_argument('--interval', type=int, default=10, help='Polling interval in seconds')
+    add_timeout_arguments(wait)
+
+    fetch = subparsers.add_parser('fetch', help='Download reports of the finished scans')
+    add_cluster_arguments(fetch)
+    add_stage_io_arguments(fetch)
+    fetch.add_argument('--directory', type=str, default='.', help='Directory for the downloaded reports')
+    fetch.add_argument('--interval', type=int, default=10, help='Polling interval in seconds')
+    add_result_source_argument(fetch)
+    add_cache_arguments(fetch)
+    add_timeout_arguments(fetch)
+
+    parse = subparsers.add_parser('parse', help='Parse downloaded reports into audit results. No API needed')
+    add_stage_io_arguments(parse)
+    parse.add_argument('--directory', type=str, default='.', help='Directory for the parsed results')
+    add_formats_argument(parse)
+    add_cache_arguments(parse)
+    parse.add_argument('--browsers', type=int, default=1,
+                       help='Amount of long-lived browsers rendering the HTML reports concurrently')
+    parse.add_argument('--browser-max-pages', type=int, default=50, help='Restart a browser after this many reports')
+    parse.add_argument('--browser-max-memory', type=float, default=1024,
+                       help='Restart a browser when it uses more memory [MB]')
+    parse.add_argument('--page-timeout', type=float, default=300, help='Maximum report rendering time in seconds')
+    parse.add_argument('--pre-rendered', action='store_true',
+                       help='HTML reports already contain the data generated by the scripts, skip the browser')
+
+    cleanup = subparsers.add_parser('cleanup', help='Remove targets and reports of the jobs')
+    add_cluster_arguments(cleanup)
+    add_stage_io_arguments(cleanup)
+    cleanup.add_argument('--stale-hours', type=float, default=None,
+                         help='Also remove targets created by this tool and reports older than this amount of hours')
+
+
+def init_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-a', '--address', type=str, help='address [url: http://donki.xyz/ or domain: donki.xyz]')
+    add_connection_arguments(parser)
+    parser.add_argument('-o', '--output-file', type=str, default='report.json', help='Output file')
     parser.add_argument('-px', '--proxy', required=False, type=str, help='Proxy settings')
     parser.add_argument('-d', '--demo-mode', type=bool, default=False,
                         help='Handle no licence limitations. Wait for other scans finished')
-    return parser.parse_args()
+    add_result_source_argument(parser)
+    add_formats_argument(parser)
+    add_cache_arguments(parser)
+    parser.add_argument('--profiles', type=enum_list(ProfileIds), default=[],
+                        help='Comma separated scan profiles run for the target [HIGH_RISK_VULNERABILITIES,FULL_SCAN]')
+    parser.add_argument('--report-templates', type=enum_list(ReportTemplateIds), default=[],
+                        help='Comma separated report templates generated for every profile [COMPREHENSIVE,DEVELOPER]')
+    parser.add_argument('--matrix-mode', type=str, default='gated', choices=MATRIX_MODES,
+                        help='gated - run the profiles in order and skip the rest when nothing is found, '
+                             'parallel - run the profiles at the same time')
+    parser.add_argument('--max-parallel', type=int, default=0,
+                        help='Maximum amount of simultaneous scans in the parallel mode [0 - unlimited]')
+    add_timeout_arguments(parser)
+    init_stage_parsers(parser)
+    arguments = parser.parse_args()
+    if arguments.profiles and not arguments.command and arguments.result_source != 'report':
+        parser.error('--profiles results are taken from the generated reports, use the report result source')
+    return arguments
 
 
 CLI_ARGUMENTS = init_args()
@@ -0,0 +1,146 @@
+"""Severity statistics and trends over many audit_result files.
+
+The issues are loaded once into columns: the severity, the target and the vulnerability name as
+integer codes and the scan date of the result, so every statistic is a single vectorized pass instead of
+a Python loop over the issue dicts.
+"""
+import contextlib
+import os
+from array import array
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+
+from core.audit_result import SEVERITY_STAT_LEVELS, Severity
+from core.report_writers import iter_result_issues, read_scan_metrics
+
+SEVERITY_LEVELS = len(SEVERITY_STAT_LEVELS)
+TREND_PERIODS = {'hour': 3600, 'day': 24 * 3600, 'week': 7 * 24 * 3600}
+
+
+class Categories:
+    """Assigns a stable integer code to every distinct value."""
+
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class IssueColumns:
+    def __init__(self, severity: np.ndarray, target: np.ndarray, name: np.ndarray, timestamp: np.ndarray,
+                 targets: list[str], names: list[str]):
+        self.severity = severity  # int8 Severity values
+        self.target = target  # int32 codes of the targets
+        self.name = name  # int32 codes of the vulnerability names
+        self.timestamp = timestamp  # int64 unix time of the result
+        self.targets = targets
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.severity)
+
+
+def result_timestamp(result_file: str, scan_metrics: dict) -> int:
+    """The scan date recorded in the scan metrics, the file modification time for older results without it."""
+    with contextlib.suppress(TypeError, ValueError):
+        scan_date = datetime.fromisoformat(scan_metrics.get('scan_date'))
+        return int((scan_date if scan_date.tzinfo else scan_date.replace(tzinfo=timezone.utc)).timestamp())
+    return int(os.path.getmtime(result_file))
+
+
+def load_results(result_files: Iterable[str]) -> IssueColumns:
+    """Streams the issues of the audit_result files into columns.
+
+    Args:
+        result_files: The audit_result files, the target is taken from the scan metrics or the file name.
+
+    """
+
+    severity, target, name = array('b'), array('i'), array('i')
+    file_timestamps, file_counts = [], []
+    targets, names = Categories(), Categories()
+    for result_file in result_files:
+        scan_metrics = read_scan_metrics(result_file)
+        target_code = targets.code(scan_metrics.get('target') or os.path.basename(result_file))
+        count = 0
+        for issue in iter_result_issues(result_file):
+            severity.append(int(issue['severity']))
+            target.append(target_code)
+            name.append(names.code(issue.get('name', '')))
+            count += 1
+        file_timestamps.append(result_timestamp(result_file, scan_metrics))
+        file_counts.append(count)
+    return IssueColumns(
+        severity=np.frombuffer(severity, dtype=np.int8) if severity else np.empty(0, dtype=np.int8),
+        target=np.frombuffer(target, dtype=np.intc).astype(np.int32) if target else np.empty(0, dtype=np.int32),
+        name=np.frombuffer(name, dtype=np.intc).astype(np.int32) if name else np.empty(0, dtype=np.int32),
+        timestamp=np.repeat(np.array(file_timestamps, dtype=np.int64), file_counts),
+        targets=targets.values,
+        names=names.values,
+    )
+
+
+def severity_counts(severity: np.ndarray) -> dict[str, int]:
+    counts = np.bincount(severity, minlength=SEVERITY_LEVELS)
+    return {level.name: int(counts[level.value]) for level in Severity}
+
+
+def severity_histogram(columns: IssueColumns) -> dict[str, int]:
+    return severity_counts(columns.severity)
+
+
+def severity_histogram_by_target(columns: IssueColumns) -> dict[str, dict[str, int]]:
+    counts = np.bincount(columns.target.astype(np.int64) * SEVERITY_LEVELS + columns.severity,
+                         minlength=len(columns.targets) * SEVERITY_LEVELS).reshape(-1, SEVERITY_LEVELS)
+    return {
+        target: {level.name: int(counts[code, level.value]) for level in Severity}
+        for code, target in enumerate(columns.targets)
+    }
+
+
+def top_vulnerability_types(columns: IssueColumns, top: int = 10,
+                            min_severity: Severity = Severity.informational) -> list[dict]:
+    """The most frequent vulnerability names with at least the given severity."""
+    counts = np.bincount(columns.name[columns.severity >= min_severity.value], minlength=len(columns.names))
+    top = min(top, np.count_nonzero(counts))
+    if not top:
+        return []
+    codes = np.argpartition(-counts, top - 1)[:top]
+    codes = codes[np.argsort(-counts[codes], kind='stable')]
+    return [{'name': columns.names[code], 'count': int(counts[code])} for code in codes]
+
+
+def severity_trend(columns: IssueColumns, period: str = 'day') -> list[dict]:
+    """Severity counts per period, ordered by time."""
+    if not len(columns):
+        return []
+    seconds = TREND_PERIODS[period]
+    buckets, bucket_codes = np.unique(columns.timestamp // seconds, return_inverse=True)
+    counts = np.bincount(bucket_codes.reshape(-1).astype(np.int64) * SEVERITY_LEVELS + columns.severity,
+                         minlength=len(buckets) * SEVERITY_LEVELS).reshape(-1, SEVERITY_LEVELS)
+    return [
+        {
+            'period': datetime.fromtimestamp(int(bucket) * seconds, tz=timezone.utc).isoformat(),
+            **{level.name: int(counts[index, level.value]) for level in Severity},
+        }
+        for index, bucket in enumerate(buckets)
+    ]
+
+
+def summarize(result_files: Iterable[str], top: int = 10, period: str = 'day') -> dict:
+    columns = load_results(result_files)
+    return {
+        'issues': len(columns),
+        'severity': severity_histogram(columns),
+        'targets': severity_histogram_by_target(columns),
+        'top_vulnerabilities': top_vulnerability_types(columns, top=top),
+        'trend': severity_trend(columns, period=period),
+    }
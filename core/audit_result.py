@@ -0,0 +1,100 @@
+import contextlib
+import json
+import os
+import tempfile
+from enum import Enum
+
+import ijson
+
+
+class Severity(Enum):
+    high = 3
+    medium = 2
+    low = 1
+    informational = 0
+
+
+SEVERITY_STAT_LEVELS = ['info_count', 'low_count', 'medium_count', 'high_count']  # indexed by Severity value
+
+
+def init_store() -> dict:
+    return {'audit_result': {
+        'scan_metrics': {},
+        'issues': [],
+        'stats': {}
+    }}
+
+
+def to_severity(value) -> int:
+    # newer Acunetix versions have the critical (4) level, the schema stops at high
+    return max(0, min(int(value or 0), len(SEVERITY_STAT_LEVELS) - 1))
+
+
+def init_issue(severity: int, name: str, url: str, description: str,
+               request: str = '', response: str = '') -> dict:
+    return {
+        'severity': severity,
+        'name': name,
+        'url': url,
+        'description': description,
+        'evidence': [{
+            'url': url,
+            'request': request,
+            'response': response
+        }]
+    }
+
+
+def severity_stats(counts: list[int]) -> dict:
+    return {level: str(count) for level, count in reversed(list(zip(SEVERITY_STAT_LEVELS, counts)))}
+
+
+def count_severities(issues) -> dict:
+    counts = [0] * len(SEVERITY_STAT_LEVELS)
+    for issue in issues:
+        counts[issue['severity']] += 1
+    return severity_stats(counts)
+
+
+def add_scan_metadata(scan_metrics: dict, target: str | None = None, scan_date: str | None = None) -> dict:
+    """Fills the target and the scan date [ISO format] in when the report itself does not contain them."""
+    for key, value in [('target', target), ('scan_date', scan_date)]:
+        if value and not scan_metrics.get(key):
+            scan_metrics[key] = value
+    return scan_metrics
+
+
+def add_result_metadata(result_file: str, target: str | None = None, scan_date: str | None = None):
+    """Fills the target and the scan date in the scan metrics of the audit_result file.
+    The issues are copied one by one into a new file, so the result is never loaded whole.
+    """
+    with open(result_file, 'rb') as f:
+        scan_metrics = next(ijson.items(f, 'audit_result.scan_metrics', use_float=True), {})
+    updated_metrics = add_scan_metadata(dict(scan_metrics), target=target, scan_date=scan_date)
+    if updated_metrics == scan_metrics:
+        return
+    with open(result_file, 'rb') as f:
+        stats = next(ijson.items(f, 'audit_result.stats', use_float=True), {})
+    descriptor, temporary_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(result_file)), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as output, open(result_file, 'rb') as source:
+            output.write('{"audit_result": {"scan_metrics": ')
+            json.dump(updated_metrics, output)
+            output.write(', "issues": [')
+            for index, issue in enumerate(ijson.items(source, 'audit_result.issues.item', use_float=True)):
+                if index:
+                    output.write(', ')
+                json.dump(issue, output)
+            output.write('], "stats": ')
+            json.dump(stats, output)
+            output.write('}}\n')
+        os.replace(temporary_file, result_file)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary_file)
+        raise
+
+
+def save_store(store: dict, output_file: str):
+    with open(output_file, 'w') as f:
+        json.dump(store, f, indent=4)
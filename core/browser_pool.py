@@ -0,0 +1,141 @@
+"""Long-lived headless browsers for rendering reports.
+
+Starting Firefox costs more than rendering a report, so the pool keeps its browsers between reports
+and replaces a browser only after max_pages reports, when it grows over max_memory_mb or when a page
+does not load in page_timeout seconds.
+"""
+import os
+import queue
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.options import Options
+
+from core.tools import timed_print
+
+
+def create_driver(page_timeout: float | None = None) -> webdriver.Firefox:
+    options = Options()
+    options.add_argument('-headless')
+    driver = webdriver.Firefox(options=options, executable_path='geckodriver')
+    if page_timeout:
+        driver.set_page_load_timeout(page_timeout)
+    return driver
+
+
+def get_process_memory_mb(pid: int | None) -> float | None:
+    """Resident memory of the process, None where /proc is not available."""
+    if not pid:
+        return None
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def get_child_pids(pid: int) -> list[int]:
+    """All descendants of the process, found by the parent PID of every process in /proc."""
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # the command name in parentheses may contain spaces, the parent PID follows the state
+                parent_pid = int(f.read().rpartition(')')[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(parent_pid, []).append(int(entry))
+    descendants, pending = [], list(children.get(pid, []))
+    while pending:
+        child_pid = pending.pop()
+        descendants.append(child_pid)
+        pending.extend(children.get(child_pid, []))
+    return descendants
+
+
+def get_process_tree_memory_mb(pid: int | None) -> float | None:
+    """Resident memory of Firefox including its content processes, where the pages actually live."""
+    memory_mb = get_process_memory_mb(pid)
+    if memory_mb is None:
+        return None
+    return memory_mb + sum(get_process_memory_mb(child_pid) or 0 for child_pid in get_child_pids(pid))
+
+
+class BrowserWorker:
+    def __init__(self, max_pages: int, max_memory_mb: float, page_timeout: float):
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.page_timeout = page_timeout
+        self.driver: webdriver.Firefox | None = None
+        self.pages = 0
+
+    @property
+    def memory_mb(self) -> float | None:
+        return get_process_tree_memory_mb(self.driver.capabilities.get('moz:processID')) if self.driver else None
+
+    @property
+    def is_exhausted(self) -> bool:
+        if self.max_pages and self.pages >= self.max_pages:
+            return True
+        memory_mb = self.memory_mb
+        return bool(self.max_memory_mb and memory_mb and memory_mb > self.max_memory_mb)
+
+    def render(self, file_absolute_path: str) -> str:
+        if not self.driver:
+            self.driver = create_driver(page_timeout=self.page_timeout)
+            self.pages = 0
+        try:
+            self.driver.get(url=f'file://{file_absolute_path}')
+            generated_html = self.driver.page_source
+        except WebDriverException:
+            self.quit()  # timed out or crashed browser is not reused
+            raise
+        self.pages += 1
+        if self.is_exhausted:
+            timed_print(f'Recycling the browser after {self.pages} page(s)')
+            self.quit()
+        return generated_html
+
+    def quit(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass
+            self.driver = None
+
+
+class BrowserPool:
+    def __init__(self, size: int = 2, max_pages: int = 50, max_memory_mb: float = 1024, page_timeout: float = 300):
+        self.size = size
+        self._workers = queue.Queue()
+        for _ in range(size):
+            self._workers.put(BrowserWorker(max_pages=max_pages, max_memory_mb=max_memory_mb,
+                                            page_timeout=page_timeout))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def render(self, file_absolute_path: str) -> str:
+        """Renders the page on the first free browser, waits if all of them are busy."""
+        worker = self._workers.get()
+        try:
+            return worker.render(file_absolute_path)
+        finally:
+            self._workers.put(worker)
+
+    def close(self):
+        for _ in range(self.size):
+            self._workers.get().quit()
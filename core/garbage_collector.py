@@ -0,0 +1,118 @@
+"""Removes targets and reports left behind by crashed runs.
+
+A target is stale when it was created by this tool (see ``AcunetixTarget.tool_description``) more than
+``max_age_hours`` ago and none of its scans is still running. A report is stale when it was generated from
+a stale target or from its scans or scan results. Nothing else is touched, the server may be shared with
+other users. Scans are removed by Acunetix together with their targets.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import requests
+
+from api.base import AcunetixAPI
+from api.classes.report import AcunetixReport
+from api.classes.scan import AcunetixScan
+from api.classes.scan_status import FINAL_ACUNETIX_STATUSES
+from api.classes.target import AcunetixTarget
+from core.tools import timed_print
+
+SCAN_REPORT_SOURCES = ['scans', 'scan_result']  # id_list holds scan or scan session IDs
+TARGET_REPORT_SOURCES = ['targets']  # id_list holds target IDs, the group sources are never collected
+
+
+class GarbageCollectionResult:
+    def __init__(self):
+        self.reclaimed_targets = 0
+        self.reclaimed_reports = 0
+        self.failed = 0
+        self.duration = 0.0
+
+    def __str__(self) -> str:
+        return (f'Reclaimed {self.reclaimed_targets} target(s) and {self.reclaimed_reports} report(s), '
+                f'failed: {self.failed}, took {self.duration:.2f} s')
+
+    def to_dict(self) -> dict:
+        return {
+            'reclaimed_targets': self.reclaimed_targets,
+            'reclaimed_reports': self.reclaimed_reports,
+            'failed': self.failed,
+            'duration': self.duration,
+        }
+
+
+class GarbageCollector:
+    def __init__(self, api: AcunetixAPI, max_age_hours: float = 24, max_workers: int = 8,
+                 batch_size: int = 50, retries: int = 3):
+        self.api = api
+        self.max_age = timedelta(hours=max_age_hours)
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.retries = retries
+
+    def find_stale_targets(self, scans: list[AcunetixScan], now: datetime) -> list[AcunetixTarget]:
+        busy_target_ids = {
+            scan.target_id for scan in scans if scan.current_session.status not in FINAL_ACUNETIX_STATUSES
+        }
+        stale_targets = []
+        for target in self.api.iter_targets():
+            created = target.tool_created_date
+            if created and now - created > self.max_age and target.target_id not in busy_target_ids:
+                stale_targets.append(target)
+        return stale_targets
+
+    def find_stale_reports(self, stale_targets: list[AcunetixTarget],
+                           scans: list[AcunetixScan]) -> list[AcunetixReport]:
+        stale_target_ids = {target.target_id for target in stale_targets}
+        stale_sessions = set()
+        for scan in scans:
+            if scan.target_id in stale_target_ids:
+                stale_sessions.update({scan.scan_id, scan.current_session.scan_session_id})
+        stale_sessions.discard(None)
+        return [
+            report for report in self.api.iter_reports()
+            if (report.source.list_type in SCAN_REPORT_SOURCES and set(report.source.id_list) & stale_sessions)
+            or (report.source.list_type in TARGET_REPORT_SOURCES and set(report.source.id_list) & stale_target_ids)
+        ]
+
+    def delete(self, item, delete_function: Callable) -> bool:
+        for attempt in range(1, self.retries + 1):
+            try:
+                response = delete_function(item)
+            except requests.exceptions.RequestException as e:
+                timed_print(f'Failed to delete {item} (attempt {attempt}): {e}')
+            else:
+                # fake client does not delete reports, 404 means somebody else removed it already
+                if response is None or response.status_code in [200, 204, 404]:
+                    return True
+                timed_print(f'Failed to delete {item} (attempt {attempt}): {response.status_code}')
+            if attempt < self.retries:
+                time.sleep(attempt)
+        return False
+
+    def delete_all(self, items: list, delete_function: Callable) -> tuple[int, int]:
+        deleted = failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                results = list(executor.map(lambda item: self.delete(item, delete_function), batch))
+                deleted += results.count(True)
+                failed += results.count(False)
+        return deleted, failed
+
+    def collect(self) -> GarbageCollectionResult:
+        result = GarbageCollectionResult()
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        scans = list(self.api.iter_scans())
+        stale_targets = self.find_stale_targets(scans=scans, now=now)
+        stale_reports = self.find_stale_reports(stale_targets=stale_targets, scans=scans)
+        timed_print(f'Found {len(stale_targets)} stale target(s) and {len(stale_reports)} stale report(s)')
+        result.reclaimed_reports, failed_reports = self.delete_all(stale_reports, self.api.delete_report)
+        result.reclaimed_targets, failed_targets = self.delete_all(stale_targets, self.api.delete_target)
+        result.failed = failed_reports + failed_targets
+        result.duration = time.perf_counter() - started
+        timed_print(f'Garbage collection finished. {result}')
+        return result
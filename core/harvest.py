@@ -0,0 +1,90 @@
+"""Early result harvesting while the scan is still running.
+
+The harvester listens to a ``ScanProgressStream`` and every time the severity counts grow it reads the
+vulnerabilities found so far, converts only the ones it has not seen yet and hands them to the consumers.
+During the scan the list is read newest first and paging stops at the first known vulnerability, so every
+harvest fetches only the delta. last_seen is neither unique nor fixed, so the final harvest after the scan
+reads the whole list and drops the known vulnerabilities on the client.
+"""
+from datetime import datetime
+from itertools import takewhile
+from typing import Callable
+
+from api.base import AcunetixAPI
+from api.classes.scan import AcunetixScan
+from core.scan_progress import ScanEvent, ScanEventKinds, ScanProgressStream
+from core.tools import timed_print
+from core.vulnerability_ingest import save_issues, to_issue
+
+
+class VulnerabilityHarvester:
+    def __init__(self, api: AcunetixAPI, with_evidence: bool = False, max_workers: int = 8):
+        self.api = api
+        self.with_evidence = with_evidence
+        self.max_workers = max_workers
+        self.issues: list[dict] = []
+        self.first_issue_time: datetime | None = None
+        self._seen: set[str] = set()
+        self._harvested_counts: dict | None = None
+        self._subscribers: list[Callable[[dict], None]] = []
+
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[dict], None]:
+        self._subscribers.append(callback)
+        return callback
+
+    def attach(self, stream: ScanProgressStream):
+        def on_event(event: ScanEvent):
+            if event.kind == ScanEventKinds.SEVERITY_COUNTS or stream.is_finished:
+                self.harvest(scan=stream.scan)
+
+        stream.subscribe(on_event)
+
+    def harvest(self, scan: AcunetixScan, complete: bool = False) -> list[dict]:
+        """Fetches the vulnerabilities that appeared since the previous harvest.
+
+        Args:
+            scan: The scan with its current session.
+            complete: Read the whole list instead of stopping at the first known vulnerability.
+
+        """
+
+        session = scan.current_session
+        if not session.scan_session_id or (not complete and session.severity_counts == self._harvested_counts):
+            return []
+        if complete:
+            vulnerabilities = [
+                vulnerability
+                for vulnerability in self.api.iter_scan_vulnerabilities(scan_id=scan.scan_id,
+                                                                        result_id=session.scan_session_id)
+                if vulnerability.vuln_id not in self._seen
+            ]
+        else:
+            newest_first = self.api.iter_scan_vulnerabilities(scan_id=scan.scan_id,
+                                                              result_id=session.scan_session_id,
+                                                              sort='last_seen:desc')
+            vulnerabilities = list(takewhile(lambda vulnerability: vulnerability.vuln_id not in self._seen,
+                                             newest_first))
+            vulnerabilities.reverse()  # keep the order the vulnerabilities were found in
+        if self.with_evidence and vulnerabilities:
+            vulnerabilities = self.api.get_scan_vulnerabilities_details(scan_id=scan.scan_id,
+                                                                        result_id=session.scan_session_id,
+                                                                        vulnerabilities=vulnerabilities,
+                                                                        max_workers=self.max_workers)
+        self._harvested_counts = session.severity_counts
+        new_issues = []
+        for vulnerability in vulnerabilities:
+            self._seen.add(vulnerability.vuln_id)
+            issue = to_issue(vulnerability)
+            new_issues.append(issue)
+            for callback in list(self._subscribers):
+                callback(issue)
+        if new_issues:
+            if not self.first_issue_time:
+                self.first_issue_time = datetime.now()
+            timed_print(f'Harvested {len(new_issues)} new vulnerabilities, {len(self._seen)} in total.')
+        self.issues.extend(new_issues)
+        return new_issues
+
+    def save(self, scan: AcunetixScan, output_file: str) -> dict:
+        self.harvest(scan=scan, complete=True)
+        return save_issues(scan=scan, issues=self.issues, output_file=output_file)
@@ -1,26 +1,60 @@
 import json
+import os
 import time
+from typing import Callable
 from urllib.parse import urlparse
 
+import requests
+
 from api.base import AcunetixAPI
 from api.classes.export import AcunetixExportReport
 from api.classes.report import AcunetixReport
 from api.classes.scan import AcunetixScan
 from api.classes.scan_status import FINAL_ACUNETIX_STATUSES, AcunetixScanStatuses
 from api.classes.target import AcunetixTarget
-from core import report_html_parser
+from api.constants import ExportTypes, ProfileIds, ReportTemplateIds
+from core import report_cache, report_writers, vulnerability_ingest
+from core.harvest import VulnerabilityHarvester
+from core.scan_matrix import ScanMatrix
+from core.scan_progress import ScanEvent, ScanEventKinds, ScanProgressStream
 from core.tools import timed_print
+from core.watchdog import Watchdog, abort_scan
+
+
+def print_scan_event(event: ScanEvent):
+    if event.kind == ScanEventKinds.STATUS:
+        timed_print(f'The current scan status is: {event.current.title()}.')
+    elif event.kind == ScanEventKinds.PROGRESS:
+        timed_print(f'The current scan progress is: {event.current}%.')
+    elif event.kind == ScanEventKinds.SEVERITY_COUNTS:
+        timed_print(f'New vulnerabilities found: {event.delta}.')
 
 
 class Analyze:
     def __init__(self, address: str, api: AcunetixAPI, output_file: str,
-                 proxy: str | None = None, demo_mode: bool = False):
+                 proxy: str | None = None, demo_mode: bool = False, result_source: str = 'report',
+                 with_evidence: bool = False, formats: list[str] | None = None,
+                 cache: report_cache.ReportCache | None = None,
+                 profiles: list[ProfileIds] | None = None, report_templates: list[ReportTemplateIds] | None = None,
+                 matrix_mode: str = 'gated', max_parallel: int = 0, watchdog: Watchdog | None = None):
         self.current_scan: AcunetixScan | None = None
         self.scan_report: AcunetixExportReport | None = None
         self.address = address
         self.api = api
         self.demo_mode = demo_mode
         self.output_file = output_file
+        self.result_source = result_source
+        self.with_evidence = with_evidence
+        self.formats = formats or []
+        self.cache = cache
+        self.profiles = profiles or []
+        self.report_templates = report_templates or []
+        self.matrix_mode = matrix_mode
+        self.max_parallel = max_parallel
+        self.progress_subscribers: list[Callable[[ScanEvent], None]] = []
+        self.harvester: VulnerabilityHarvester | None = None
+        self.watchdog = watchdog or Watchdog()
+        self.watchdog.start()
         self.target = self.init_target()
         if proxy:
             self.init_proxy(proxy)
@@ -37,46 +71,115 @@ class Analyze:
                 if not all_finished:
                     time.sleep(4 * 60)  # sleep 4 minutes
             timed_print('Demo mode is turned on. All previous tasks completed. Start usual scan.')
-        return self.api.create_target(self.address)
+        try:
+            return self.api.create_target(self.address)
+        except requests.exceptions.HTTPError as e:
+            timed_print(f'{e}\nExit')
+            self.watchdog.stop()
+            self.api.close_session()
+            exit(1)
 
     def init_proxy(self, proxy: str) -> None:
         proxy = urlparse(proxy)
         timed_print(f'Set up a proxy configuration with host: {proxy.hostname} and port: {proxy.port}')
-        self.api.setup_proxy_configuration(target_id=self.target.target_id,
-                                           host=str(proxy.hostname),
-                                           port=proxy.port,
-                                           protocol=proxy.scheme)
+        errors = self.api.configure_targets(target_ids=[self.target.target_id],
+                                            configuration=self.api.proxy_configuration(host=str(proxy.hostname),
+                                                                                       port=proxy.port,
+                                                                                       protocol=proxy.scheme))
+        if errors:
+            self.exit_application(exit_code=1, message=f'Proxy settings have not been changed. {errors}')
+        timed_print('Proxy settings changed successfully.')
 
     def run_scan_and_get_report(self) -> None:
-        self.current_scan = self.api.run_scan(target_id=self.target.target_id)
+        if self.profiles:
+            self.run_scan_matrix()
+            return
+        try:
+            self.current_scan = self.api.run_scan(target_id=self.target.target_id)
+        except requests.exceptions.HTTPError as e:
+            self.exit_with_error(message=str(e))
         timed_print(f'The scan: {self.current_scan.scan_id} was created successfully. Wait for the scan to complete.')
+        if self.result_source == 'live':
+            self.init_harvester()
         self.current_scan = self.wait_for_finishing_scan()
-        if self.current_scan.current_session.status != AcunetixScanStatuses.COMPLETED.value:
+        status = self.current_scan.current_session.status
+        if status != AcunetixScanStatuses.COMPLETED.value:
             self.exit_with_error(message=f'Target scan was not competed and finished with status: {status}.')
-        timed_print('Checking reports...')
-        self.work_with_report_for_targets()
-        # self.scan_report = self.api.run_scan_export(scan_id=self.current_scan.current_session.scan_session_id,
-        #                                             export_id=ExportTypes.JSON.value)
-        # report_status = self.wait_for_finishing_report()
-        # if report_status != AcunetixScanStatuses.COMPLETED.value:
-        #     self.exit_with_error(message=f'Scan was completed , but export finished with status: {status}.')
-        # self.download_report(report_name=self.scan_report.download_json_name, output_file=self.output_file)
+        if self.result_source == 'export':
+            timed_print('Checking export...')
+            self.work_with_export_for_targets()
+        elif self.result_source == 'live':
+            timed_print('Harvesting the remaining vulnerabilities...')
+            self.harvester.save(scan=self.current_scan, output_file=self.output_file)
+        elif self.result_source == 'vulnerabilities':
+            timed_print('Checking vulnerabilities...')
+            vulnerability_ingest.ingest_scan_results(api=self.api, scan=self.current_scan,
+                                                     output_file=self.output_file, with_evidence=self.with_evidence)
+        else:
+            timed_print('Checking reports...')
+            self.work_with_report_for_targets()
+        if self.formats:
+            report_writers.convert_audit_result(result_file=self.output_file, formats=self.formats)
         self.exit_application(message='Exiting...')
 
+    def run_scan_matrix(self) -> None:
+        matrix = ScanMatrix(api=self.api, target=self.target, profiles=self.profiles,
+                            templates=self.report_templates, mode=self.matrix_mode, max_parallel=self.max_parallel,
+                            directory=os.path.dirname(os.path.abspath(self.output_file)), cache=self.cache,
+                            watchdog=self.watchdog)
+        results = matrix.run()
+        for result in results:
+            for report in result['reports']:
+                if report['template'] != ReportTemplateIds.COMPREHENSIVE.name or not report.get('report_file'):
+                    continue
+                report['result_file'] = report_cache.parse_downloaded_report(
+                    report_file=report['report_file'], cache=self.cache,
+                    output_file=f'{os.path.splitext(self.output_file)[0]}_{result["profile"].lower()}.json',
+                    target=self.target.address, scan_date=result['scan_date'] or report.get('generation_date'),
+                )
+                if self.formats:
+                    report['converted_files'] = report_writers.convert_audit_result(result_file=report['result_file'],
+                                                                                    formats=self.formats)
+        with open(self.output_file, 'w') as f:
+            json.dump({'matrix': results}, f, indent=4)
+        timed_print(f'Results saved to {self.output_file}')
+        self.exit_application(message='Exiting...')
+
+    @property
+    def live_output_file(self) -> str:
+        return f'{os.path.splitext(self.output_file)[0]}.live.jsonl'
+
+    def init_harvester(self):
+        self.harvester = VulnerabilityHarvester(api=self.api, with_evidence=self.with_evidence)
+        open(self.live_output_file, 'w').close()
+        timed_print(f'Vulnerabilities found during the scan are written to {self.live_output_file}')
+
+        @self.harvester.subscribe
+        def write_live_issue(issue: dict):
+            with open(self.live_output_file, 'a') as f:
+                f.write(f'{json.dumps(issue)}\n')
+
     def exit_with_error(self, message: str):
         with open(self.output_file, 'w') as f:
             json.dump({'failed': message}, f, indent=4)
         self.exit_application(exit_code=1, message=message)
 
     def wait_for_finishing_scan(self) -> AcunetixScan:
-        while True:
-            scan = self.api.get_scan(scan_id=self.current_scan.scan_id)
-            if scan.current_session.status in FINAL_ACUNETIX_STATUSES:
-                timed_print(f'Scanning ended with status: {scan.current_session.status.title()}.')
-                break
-            else:
-                timed_print(f'The current scan status is: {scan.current_session.status.title()}.')
-            time.sleep(10)
+        stream = ScanProgressStream(api=self.api, scan_id=self.current_scan.scan_id)
+        for callback in [print_scan_event, *self.progress_subscribers]:
+            stream.subscribe(callback)
+        if self.harvester:
+            self.harvester.attach(stream)
+        job = self.watchdog.watch_scan(stream, on_timeout=lambda: abort_scan(api=self.api, stream=stream))
+        scan = stream.run()
+        self.watchdog.done(job.key)
+        if job.expired.is_set() and job.timeout_failed:
+            self.exit_with_error(message='The scan exceeded its deadline with status: '
+                                         f'{scan.current_session.status}, but it was not aborted.')
+        if job.expired.is_set():
+            self.exit_with_error(message='The scan exceeded its deadline and was aborted with status: '
+                                         f'{scan.current_session.status}.')
+        timed_print(f'Scanning ended with status: {scan.current_session.status.title()}.')
         return scan
 
     def wait_for_finishing_report(self) -> "AcunetixScanStatuses.value":
@@ -90,36 +193,71 @@ class Analyze:
             time.sleep(10)
         return report.status
 
-    def download_report(self, report_name: str, output_file: str):
+    def download_report(self, report_name: str, output_file: str) -> str:
         report_file = self.api.download_report(descriptor=report_name)
         timed_print('Report received')
         with open(output_file, 'w') as f:
             f.write(report_file.text)
             timed_print(f'Results saved to {output_file}')
+        return output_file
 
     def work_with_report_for_targets(self):
         # self.scan_report = self.api.run_scan_report(scan_id=self.current_scan.current_session.scan_session_id,
         #                                             template_id=ReportTemplateIds.COMPREHENSIVE.value)
+        job = self.watchdog.watch(key=f'Report of {self.current_scan.current_session.scan_session_id}',
+                                  timeout=self.watchdog.limits.report_timeout)
         report_generated = False
         while not report_generated:
+            if job.expired.is_set():
+                self.exit_with_error(message=f'Report was not generated in {self.watchdog.limits.report_minutes} '
+                                             'minutes.')
             reports = self.api.get_reports(target_id=self.current_scan.current_session.scan_session_id)
             timed_print(f'Reports received. Amount of valid reports: {len(reports)}')
             if not reports:
                 timed_print('No reports. Wait for generation')
-                time.sleep(10)
+                job.expired.wait(10)
                 continue
             report = reports[-1]  # get only one report
             # report = self.api.get_report(report_id=self.scan_report.report_id)
             if report.status in [AcunetixScanStatuses.PROCESSING.value, AcunetixScanStatuses.QUEUED.value]:
                 timed_print('Report is still generating. Wait for competing')
-                time.sleep(10)
+                job.expired.wait(10)
                 continue
             if report.status != AcunetixScanStatuses.COMPLETED.value:
                 self.exit_with_error(message='Error while generating report. '
                                              f'API response of report status: {report.status}.')
             report_generated = True
-            self.download_report(report_name=report.download_html_name, output_file=report.download_html_name)
-            report_html_parser.parse_html(file_absolute_path=report.download_html_name, output_file=self.output_file)
+            self.watchdog.done(job.key)
+            report_file = report_cache.get_report(cache=self.cache, report_id=report.report_id,
+                                                  file_name=report.download_html_name,
+                                                  download=lambda output_file: self.download_report(
+                                                      report_name=report.download_html_name, output_file=output_file))
+            report_cache.parse_downloaded_report(report_file=report_file, output_file=self.output_file,
+                                                 cache=self.cache, target=self.target.address,
+                                                 scan_date=self.current_scan.current_session.start_date
+                                                 or report.generation_date)
+
+    def work_with_export_for_targets(self, export_type: ExportTypes = ExportTypes.JSON):
+        self.scan_report = self.api.run_scan_export(scan_id=self.current_scan.current_session.scan_session_id,
+                                                    export_id=export_type.value)
+        job = self.watchdog.watch(key=f'Export {self.scan_report.report_id}',
+                                  timeout=self.watchdog.limits.report_timeout)
+        self.scan_report = self.api.wait_for_export(export_id=self.scan_report.report_id, expired=job.expired)
+        self.watchdog.done(job.key)
+        if self.scan_report.status != AcunetixScanStatuses.COMPLETED.value:
+            self.exit_with_error(message='Scan was completed, but export finished with status: '
+                                         f'{self.scan_report.status}.')
+        export_file = report_cache.get_report(cache=self.cache, report_id=self.scan_report.report_id,
+                                              file_name=self.scan_report.download_name,
+                                              download=lambda output_file: self.api.download_export(
+                                                  export=self.scan_report, output_file=output_file))
+        if export_type == ExportTypes.JSON:
+            report_cache.parse_downloaded_report(report_file=export_file, output_file=self.output_file,
+                                                 cache=self.cache, target=self.target.address,
+                                                 scan_date=self.current_scan.current_session.start_date
+                                                 or self.scan_report.generation_date)
+        else:
+            timed_print(f'Export saved to {export_file}. Only JSON exports are converted to the audit result.')
 
     def wait_for_all_scans_are_finished(self) -> bool:
         title = 'DEMO MODE:'
@@ -162,6 +300,8 @@ class Analyze:
 
     def exit_application(self, exit_code: int = 0, message: str = 'Exiting application'):
         self.remove_current_data()
+        timed_print(f'API client metrics: {self.api.metrics.to_dict()}')
+        self.watchdog.stop()
         self.api.close_session()
         timed_print(message)
         exit(exit_code)
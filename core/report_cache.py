@@ -0,0 +1,219 @@
+"""On-disk cache of downloaded reports and their parse results.
+
+    <directory>/index.json                                  report ID -> content hash of the report
+    <directory>/index.lock                                  serializes index updates of all processes
+    <directory>/reports/<content hash><extension>           downloaded reports
+    <directory>/results/<content hash>-<parser>-v<version>.json  parse results
+
+Results are keyed by the content hash and the parser version, so a parser fix invalidates them without
+touching the downloaded reports. Least recently used files are evicted when the cache grows over max_bytes,
+except the ones put in by this process, which the caller is still about to use. A report evicted by
+another process is downloaded again.
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Callable
+
+from core import audit_result, report_html_parser, report_json_parser
+from core.browser_pool import BrowserPool
+from core.tools import timed_print
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReportCache:
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.reports_directory = os.path.join(self.directory, 'reports')
+        self.results_directory = os.path.join(self.directory, 'results')
+        self.index_file = os.path.join(self.directory, 'index.json')
+        self.index_lock_file = os.path.join(self.directory, 'index.lock')
+        os.makedirs(self.reports_directory, exist_ok=True)
+        os.makedirs(self.results_directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pinned: set[str] = set()
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.decoder.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: dict):
+        descriptor, temporary_file = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as f:
+                json.dump(index, f)
+            os.replace(temporary_file, self.index_file)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary_file)
+            raise
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        """Serializes the index updates of all threads and of all processes sharing the cache directory."""
+        with self._lock, open(self.index_lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _touch(file_path: str) -> str:
+        os.utime(file_path)  # modification time is the LRU clock, access time is often disabled
+        return file_path
+
+    def content_hash(self, report_file: str) -> str:
+        if os.path.dirname(os.path.abspath(report_file)) == self.reports_directory:
+            return os.path.splitext(os.path.basename(report_file))[0]
+        return hash_file(report_file)
+
+    def get_report(self, report_id: str) -> str | None:
+        entry = self._read_index().get(report_id)  # the index is replaced atomically, reading needs no lock
+        if not entry:
+            return None
+        report_file = os.path.join(self.reports_directory, f'{entry["hash"]}{entry["extension"]}')
+        return self._touch(report_file) if os.path.exists(report_file) else None
+
+    def put_report(self, report_id: str, source_file: str) -> str:
+        """Moves the downloaded file into the cache and returns its new path."""
+        content_hash = hash_file(source_file)
+        extension = os.path.splitext(source_file)[1]
+        report_file = os.path.join(self.reports_directory, f'{content_hash}{extension}')
+        shutil.move(source_file, report_file)
+        with self._index_lock():
+            index = self._read_index()
+            index[report_id] = {'hash': content_hash, 'extension': extension}
+            self._write_index(index)
+            self._pinned.add(report_file)
+        self.evict()
+        return report_file
+
+    def result_file(self, report_file: str, parser_name: str, parser_version: int) -> str:
+        return os.path.join(self.results_directory,
+                            f'{self.content_hash(report_file)}-{parser_name}-v{parser_version}.json')
+
+    def get_result(self, report_file: str, parser_name: str, parser_version: int) -> str | None:
+        result_file = self.result_file(report_file, parser_name, parser_version)
+        return self._touch(result_file) if os.path.exists(result_file) else None
+
+    def put_result(self, report_file: str, parser_name: str, parser_version: int, source_file: str) -> str:
+        result_file = self.result_file(report_file, parser_name, parser_version)
+        shutil.copyfile(source_file, result_file)
+        self.evict(keep={result_file})
+        return result_file
+
+    def evict(self, keep: set[str] = frozenset()):
+        """Removes the least recently used files until the cache fits into max_bytes.
+        The pinned reports and the kept files are never removed, even if they alone exceed the limit.
+        """
+        with self._lock:
+            keep = self._pinned | keep
+            files = []
+            for directory in [self.reports_directory, self.results_directory]:
+                for entry in os.scandir(directory):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # removed by another process
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size = sum(size for _, size, _ in files)
+            for _, size, file_path in sorted(files):
+                if total_size <= self.max_bytes:
+                    break
+                if file_path in keep:
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(file_path)
+                total_size -= size
+                timed_print(f'Evicted {file_path} from the report cache')
+
+
+def get_report(cache: ReportCache | None, report_id: str, file_name: str,
+               download: Callable[[str], str], directory: str = '.') -> str:
+    """Returns the cached report or downloads it.
+
+    Args:
+        cache: The report cache, None to always download.
+        report_id: The report identifier.
+        file_name: The name of the downloaded report file.
+        download: Saves the report to the given file path and returns the path.
+        directory: Where to download the report when there is no cache.
+
+    """
+
+    if cache is None:
+        return download(os.path.abspath(os.path.join(directory, file_name)))
+    if report_file := cache.get_report(report_id):
+        timed_print(f'Report {report_id} found in the cache: {report_file}')
+        return report_file
+    temporary_directory = tempfile.mkdtemp(dir=cache.directory)
+    try:
+        return cache.put_report(report_id, download(os.path.join(temporary_directory, file_name)))
+    finally:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+
+def parse_report(cache: ReportCache | None, report_file: str, output_file: str,
+                 parse: Callable[[str, str], None], parser_name: str, parser_version: int) -> str:
+    """Copies the cached parse result to the output file or parses the report and caches the result.
+
+    Args:
+        cache: The report cache, None to always parse.
+        report_file: The downloaded report.
+        output_file: The audit_result file.
+        parse: The parser, called with the report and the output file.
+        parser_name: The name of the parser [html, html-raw, json].
+        parser_version: The parser version, a new version invalidates the cached results.
+
+    """
+
+    if cache and (result_file := cache.get_result(report_file, parser_name, parser_version)):
+        timed_print(f'Parse result found in the cache: {result_file}')
+        shutil.copyfile(result_file, output_file)
+        return output_file
+    parse(report_file, output_file)
+    if cache:
+        cache.put_result(report_file, parser_name, parser_version, output_file)
+    return output_file
+
+
+def parse_downloaded_report(report_file: str, output_file: str, cache: ReportCache | None = None,
+                            browser_pool: BrowserPool | None = None, render: bool = True,
+                            target: str | None = None, scan_date: str | None = None) -> str:
+    """Parses the HTML report or the JSON export depending on the file extension.
+    The target and the scan date are recorded in the scan metrics when the report does not contain them.
+    They are not part of the cache key, so they are added to the output of both the parser and the cache.
+    """
+    if report_file.endswith('.json'):
+        parse_report(cache=cache, report_file=report_file, output_file=output_file,
+                     parse=lambda source, output: report_json_parser.parse_json(file_absolute_path=source,
+                                                                               output_file=output),
+                     parser_name='json', parser_version=report_json_parser.PARSER_VERSION)
+    else:
+        parse_report(cache=cache, report_file=report_file, output_file=output_file,
+                     parse=lambda source, output: report_html_parser.parse_html(file_absolute_path=source,
+                                                                               output_file=output,
+                                                                               browser_pool=browser_pool,
+                                                                               render=render),
+                     # unrendered reports lack the script generated data, so the results differ
+                     parser_name='html' if render else 'html-raw',
+                     parser_version=report_html_parser.PARSER_VERSION)
+    audit_result.add_result_metadata(output_file, target=target, scan_date=scan_date)
+    return output_file
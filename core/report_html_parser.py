@@ -1,24 +1,21 @@
-import json
-from enum import Enum
+import os
+import tempfile
+from typing import Iterable
 
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
 
+from core import report_slicer
+from core.audit_result import Severity, init_store, save_store
+from core.browser_pool import BrowserPool, create_driver
 from core.tools import timed_print
 
+PARSER_VERSION = 3  # increase on every change of the output, it invalidates the cached results
 
-class Severity(Enum):
-    high = 3
-    medium = 2
-    low = 1
-    informational = 0
 
-
-def get_page(file_absolute_path: str):
-    options = Options()
-    options.add_argument('-headless')
-    driver = webdriver.Firefox(options=options, executable_path='geckodriver')
+def get_page(file_absolute_path: str, browser_pool: BrowserPool | None = None):
+    if browser_pool:
+        return browser_pool.render(file_absolute_path)
+    driver = create_driver()
     driver.get(url=f'file://{file_absolute_path}')
     generated_html = driver.page_source
     driver.quit()
@@ -79,12 +76,16 @@ def get_vuln_urls(soup: BeautifulSoup):
 
 
 def get_vuln_instances(store: dict, soup: BeautifulSoup):
-    issues = []
     vuln_entries = get_vuln_entries(soup=soup)
     section_vuln_details = soup.find('div', {'id': 'section_vuln_details'})
     if not section_vuln_details:
         return store
     vuln_entries_details = section_vuln_details.find_all('div', class_='vuln_type')
+    return add_vuln_issues(store=store, vuln_entries=vuln_entries, vuln_entries_details=vuln_entries_details)
+
+
+def add_vuln_issues(store: dict, vuln_entries: list[dict], vuln_entries_details: Iterable[BeautifulSoup]):
+    issues = []
     # add handler
     for vuln_entry, vuln_entry_details in zip(vuln_entries, vuln_entries_details):
         vuln_urls = get_vuln_urls(soup=vuln_entry_details)
@@ -109,27 +110,45 @@ def get_vuln_stats(store, soup):
     return store
 
 
-def parse_html(file_absolute_path: str, output_file):
+def to_soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, 'html.parser')
+
+
+def parse_sliced_html(store: dict, file_absolute_path: str):
+    """Parses only the report sections, located in the memory-mapped file, one by one."""
+    with report_slicer.map_file(file_absolute_path) as buffer:
+        store = get_scan_details(store=store, soup=to_soup(report_slicer.scan_details_slice(buffer)))
+        timed_print('Parsing of general report data is complete.')
+        vuln_entries = [
+            vuln_entry
+            for impact_entry in report_slicer.impact_entry_slices(buffer)
+            for vuln_entry in get_vuln_entries(soup=to_soup(impact_entry))
+        ]
+        vuln_entries_details = (to_soup(vuln_type) for vuln_type in report_slicer.vuln_type_slices(buffer))
+        store = add_vuln_issues(store=store, vuln_entries=vuln_entries, vuln_entries_details=vuln_entries_details)
+        store = get_vuln_stats(store=store, soup=to_soup(report_slicer.severity_stats_slice(buffer)))
+    return store
+
+
+def parse_html(file_absolute_path: str, output_file, browser_pool: BrowserPool | None = None, render: bool = True):
     timed_print(f'Starting parsing of {file_absolute_path}')
-    store = {'audit_result': {
-        'scan_metrics': {},
-        'issues': [],
-        'stats': {}
-    }}
-    # need to open in browser for generating data through js scripts
-    generated_html = get_page(file_absolute_path=file_absolute_path)
-    soup = BeautifulSoup(generated_html, 'html.parser')
-    # # soup = BeautifulSoup(generated_html, 'lxml')
-    # with open(file_absolute_path, 'r') as source_file:
-    #     soup = BeautifulSoup(source_file, 'html.parser')
-    timed_print('The generated report page was successfully received.')
-    store = get_scan_details(store=store, soup=soup)
-    timed_print('Parsing of general report data is complete.')
-    store = get_vuln_instances(store=store, soup=soup)
-    store = get_vuln_stats(store=store, soup=soup)
+    store = init_store()
+    if not render:
+        store = parse_sliced_html(store=store, file_absolute_path=file_absolute_path)
+    else:
+        # need to open in browser for generating data through js scripts
+        generated_html = get_page(file_absolute_path=file_absolute_path, browser_pool=browser_pool)
+        timed_print('The generated report page was successfully received.')
+        # the rendered page goes to disk right away, so it is sliced like a pre-rendered report
+        with tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False) as rendered_file:
+            rendered_file.write(generated_html)
+        del generated_html
+        try:
+            store = parse_sliced_html(store=store, file_absolute_path=rendered_file.name)
+        finally:
+            os.remove(rendered_file.name)
     timed_print('Completed parsing of vulnerability data from the report.')
-    with open(output_file, 'w') as f:
-        json.dump(store, f, indent=4)
+    save_store(store=store, output_file=output_file)
 
 
 if __name__ == '__main__':
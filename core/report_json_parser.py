@@ -0,0 +1,102 @@
+"""Converts the Acunetix JSON export into the audit_result schema produced by report_html_parser.
+
+The export is read with a streaming parser, so the vulnerabilities are never loaded all at once:
+the first pass collects the small parts of the document (scan info and vulnerability types),
+the second one converts vulnerabilities one by one and writes them straight to the output file.
+"""
+import json
+from typing import Iterator
+
+import ijson
+
+from core.audit_result import SEVERITY_STAT_LEVELS, init_issue, severity_stats, to_severity
+from core.tools import timed_print
+
+PARSER_VERSION = 2  # increase on every change of the output, it invalidates the cached results
+
+SCAN_INFO_PREFIX = 'export.scans.item.info'
+VULNERABILITY_TYPES_PREFIX = 'export.scans.item.vulnerability_types.item'
+VULNERABILITIES_PREFIX = 'export.scans.item.vulnerabilities.item'
+
+
+def first_value(data: dict, *keys, default=''):
+    for key in keys:
+        if data.get(key) not in (None, ''):
+            return data[key]
+    return default
+
+
+def collect_objects(file_absolute_path: str, prefixes: list[str]) -> dict[str, list]:
+    """Builds only the objects under the given prefixes during one pass over the file."""
+    results = {prefix: [] for prefix in prefixes}
+    builder, current_prefix, depth = None, None, 0
+    with open(file_absolute_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is None:
+                if prefix not in results or event not in ('start_map', 'start_array'):
+                    continue
+                builder, current_prefix, depth = ijson.ObjectBuilder(), prefix, 0
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+            if not depth:
+                results[current_prefix].append(builder.value)
+                builder = None
+    return results
+
+
+def get_scan_metrics(scan_infos: list[dict]) -> dict:
+    if not scan_infos:
+        return {}
+    info = scan_infos[0]
+    return {
+        'target': first_value(info, 'start_url', 'host'),
+        'duration': first_value(info, 'duration'),
+        'total_requests': first_value(info, 'total_requests', 'requests'),
+        'avg_response_time': first_value(info, 'avg_response_time'),
+        'max_response_time': first_value(info, 'max_response_time'),
+        'vuln_instances_total': first_value(info, 'vuln_instances_total'),
+    }
+
+
+def iter_issues(file_absolute_path: str, vulnerability_types: dict[str, dict]) -> Iterator[dict]:
+    with open(file_absolute_path, 'rb') as f:
+        for vulnerability in ijson.items(f, VULNERABILITIES_PREFIX, use_float=True):
+            info = vulnerability.get('info', vulnerability)
+            vulnerability_type = vulnerability_types.get(info.get('vt_id'), {})
+            yield init_issue(
+                severity=to_severity(first_value(info, 'severity', default=vulnerability_type.get('severity'))),
+                name=first_value(info, 'name', 'vt_name', default=vulnerability_type.get('name', '')),
+                url=first_value(info, 'url', 'loc_url', 'affects_url'),
+                description=first_value(info, 'details', 'description',
+                                        default=vulnerability_type.get('description', '')),
+                request=first_value(info, 'request'),
+                response=first_value(vulnerability, 'response', default=info.get('response', '')),
+            )
+
+
+def parse_json(file_absolute_path: str, output_file: str):
+    timed_print(f'Starting parsing of {file_absolute_path}')
+    objects = collect_objects(file_absolute_path, [SCAN_INFO_PREFIX, VULNERABILITY_TYPES_PREFIX])
+    vulnerability_types = {
+        vulnerability_type.get('vt_id'): vulnerability_type
+        for vulnerability_type in objects[VULNERABILITY_TYPES_PREFIX]
+    }
+    scan_metrics = get_scan_metrics(objects[SCAN_INFO_PREFIX])
+    timed_print('Parsing of general export data is complete.')
+    counts = [0] * len(SEVERITY_STAT_LEVELS)
+    with open(output_file, 'w') as f:
+        f.write('{"audit_result": {"scan_metrics": ')
+        json.dump(scan_metrics, f)
+        f.write(', "issues": [')
+        for index, issue in enumerate(iter_issues(file_absolute_path, vulnerability_types)):
+            if index:
+                f.write(', ')
+            json.dump(issue, f)
+            counts[issue['severity']] += 1
+        f.write('], "stats": ')
+        json.dump(severity_stats(counts), f)
+        f.write('}}\n')
+    timed_print('Completed parsing of vulnerability data from the export.')
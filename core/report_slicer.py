@@ -0,0 +1,82 @@
+"""Byte-level lookup of the report sections over a memory-mapped file.
+
+Only the located slices are decoded and handed to BeautifulSoup, so the whole report is never
+loaded as a Python string or as one parse tree.
+"""
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from typing import Iterator
+
+SCAN_DETAILS_TABLE = re.compile(rb'<table\b[^>]*\bclass="[^"]*\bpanel-table(?:-2)?\b')
+IMPACT_ENTRY_ROW = re.compile(rb'<tr\b[^>]*\bclass="[^"]*\bimpact_entry\b')
+VULN_DETAILS_SECTION = re.compile(rb'<div\b[^>]*\bid="section_vuln_details"')
+VULN_TYPE_DIV = re.compile(rb'<div\b[^>]*\bclass="[^"]*\bvuln_type\b')
+SEVERITY_STATS_DIV = re.compile(rb'<div\b[^>]*\bdata-template="stat_severity_counts"')
+
+TAG_PATTERNS = {}
+
+
+def tag_pattern(tag: bytes) -> re.Pattern:
+    if tag not in TAG_PATTERNS:
+        TAG_PATTERNS[tag] = re.compile(rb'<(/?)' + tag + rb'\b[^>]*?(/?)>')
+    return TAG_PATTERNS[tag]
+
+
+@contextmanager
+def map_file(file_absolute_path: str) -> Iterator[mmap.mmap]:
+    with open(file_absolute_path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            yield b''  # empty files can not be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def find_element_end(buffer, start: int, tag: bytes, end: int | None = None) -> int:
+    """End offset of the element which start tag is at the start offset, nested elements are skipped."""
+    end = len(buffer) if end is None else end
+    depth = 0
+    for match in tag_pattern(tag).finditer(buffer, start, end):
+        is_closing, is_self_closing = match.group(1), match.group(2)
+        if is_self_closing:
+            continue
+        depth += -1 if is_closing else 1
+        if not depth:
+            return match.end()
+    return end
+
+
+def iter_element_bounds(buffer, pattern: re.Pattern, tag: bytes,
+                        start: int = 0, end: int | None = None) -> Iterator[tuple[int, int]]:
+    end = len(buffer) if end is None else end
+    position = start
+    while match := pattern.search(buffer, position, end):
+        element_end = find_element_end(buffer, match.start(), tag, end)
+        yield match.start(), element_end
+        position = element_end
+
+
+def iter_slices(buffer, pattern: re.Pattern, tag: bytes,
+                start: int = 0, end: int | None = None) -> Iterator[str]:
+    for element_start, element_end in iter_element_bounds(buffer, pattern, tag, start, end):
+        yield buffer[element_start:element_end].decode('utf-8', errors='replace')
+
+
+def scan_details_slice(buffer) -> str:
+    return ''.join(iter_slices(buffer, SCAN_DETAILS_TABLE, b'table'))
+
+
+def impact_entry_slices(buffer) -> Iterator[str]:
+    return iter_slices(buffer, IMPACT_ENTRY_ROW, b'tr')
+
+
+def vuln_type_slices(buffer) -> Iterator[str]:
+    for section_start, section_end in iter_element_bounds(buffer, VULN_DETAILS_SECTION, b'div'):
+        yield from iter_slices(buffer, VULN_TYPE_DIV, b'div', section_start, section_end)
+        return
+
+
+def severity_stats_slice(buffer) -> str:
+    return next(iter_slices(buffer, SEVERITY_STATS_DIV, b'div'), '')
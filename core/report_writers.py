@@ -0,0 +1,189 @@
+"""Streaming writers converting audit_result issues into formats other tools read.
+
+All requested formats are written during a single pass over the issues, and every writer keeps only
+the current issue in memory, so the size of the report does not matter.
+"""
+import csv
+import json
+import re
+from typing import Iterable, Iterator
+from xml.sax.saxutils import quoteattr, escape
+
+import ijson
+
+from core.audit_result import Severity
+from core.tools import timed_print
+
+SARIF_LEVELS = {3: 'error', 2: 'warning', 1: 'note', 0: 'none'}
+# control characters and non-characters are not allowed in XML 1.0 even when escaped
+XML_ILLEGAL_CHARACTERS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def xml_text(value) -> str:
+    return XML_ILLEGAL_CHARACTERS.sub('', str(value))
+
+
+class ReportWriter:
+    extension = ''
+
+    def __init__(self, output_file: str, scan_metrics: dict):
+        self.output_file = output_file
+        self.scan_metrics = scan_metrics
+        self.count = 0
+        self.file = open(output_file, 'w', newline='', encoding='utf-8')
+        self.begin()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def begin(self):
+        pass
+
+    def write_issue(self, issue: dict):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+    def write(self, issue: dict):
+        self.write_issue(issue)
+        self.count += 1
+
+    def close(self):
+        self.end()
+        self.file.close()
+
+
+class JsonLinesWriter(ReportWriter):
+    extension = 'jsonl'
+
+    def write_issue(self, issue: dict):
+        self.file.write(json.dumps(issue, separators=(',', ':')))
+        self.file.write('\n')
+
+
+class CsvWriter(ReportWriter):
+    extension = 'csv'
+    columns = ['severity', 'severity_name', 'name', 'url', 'description']
+
+    def begin(self):
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+
+    def write_issue(self, issue: dict):
+        self.writer.writerow([
+            issue['severity'],
+            Severity(issue['severity']).name,
+            issue.get('name', ''),
+            issue.get('url', ''),
+            issue.get('description', ''),
+        ])
+
+
+class SarifWriter(ReportWriter):
+    extension = 'sarif'
+
+    def begin(self):
+        self.file.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", '
+                        '"runs": [{"tool": {"driver": {"name": "Acunetix", '
+                        '"informationUri": "https://www.acunetix.com/"}}, ')
+        self.file.write(f'"properties": {json.dumps(self.scan_metrics)}, "results": [')
+
+    def write_issue(self, issue: dict):
+        result = {
+            'ruleId': issue.get('name', ''),
+            'level': SARIF_LEVELS.get(issue['severity'], 'none'),
+            'message': {'text': issue.get('description') or issue.get('name', '')},
+            'locations': [{'physicalLocation': {'artifactLocation': {'uri': issue.get('url', '')}}}],
+        }
+        if self.count:
+            self.file.write(', ')
+        self.file.write(json.dumps(result))
+
+    def end(self):
+        self.file.write(']}]}\n')
+
+
+class JUnitWriter(ReportWriter):
+    """Every issue is a test case, everything above informational is a failure.
+    The totals are known only at the end, so they are reserved in the header and filled in on close.
+    """
+    extension = 'xml'
+    counter_width = 10
+
+    def begin(self):
+        self.failures = 0
+        target = self.scan_metrics.get('target', '')
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.write(f'<testsuites><testsuite name={quoteattr(xml_text(f"Acunetix {target}".strip()))} tests="')
+        self.counters_position = self.file.tell()
+        self.file.write(f'{0:0{self.counter_width}d}" failures="{0:0{self.counter_width}d}">\n')
+
+    def write_issue(self, issue: dict):
+        name = quoteattr(xml_text(issue.get('url', '')))
+        class_name = quoteattr(xml_text(issue.get('name', '')))
+        self.file.write(f'<testcase classname={class_name} name={name}>')
+        if issue['severity'] > Severity.informational.value:
+            self.failures += 1
+            message = quoteattr(xml_text(f'{Severity(issue["severity"]).name}: {issue.get("name", "")}'))
+            self.file.write(f'<failure message={message}>{escape(xml_text(issue.get("description", "")))}</failure>')
+        self.file.write('</testcase>\n')
+
+    def end(self):
+        self.file.write('</testsuite></testsuites>\n')
+        self.file.seek(self.counters_position)
+        self.file.write(f'{self.count:0{self.counter_width}d}" failures="{self.failures:0{self.counter_width}d}')
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'sarif': SarifWriter,
+    'junit': JUnitWriter,
+}
+
+
+def write_formats(issues: Iterable[dict], outputs: dict[str, str], scan_metrics: dict | None = None) -> int:
+    """Writes the issues to all outputs at once.
+
+    Args:
+        issues: The audit_result issues, any iterable, it is consumed once.
+        outputs: The output file for every format [jsonl, csv, sarif, junit].
+        scan_metrics: The audit_result scan metrics.
+
+    """
+
+    writers = [WRITERS[output_format](output_file, scan_metrics or {}) for output_format, output_file in outputs.items()]
+    count = 0
+    try:
+        for issue in issues:
+            for writer in writers:
+                writer.write(issue)
+            count += 1
+    finally:
+        for writer in writers:
+            writer.close()
+    timed_print(f'{count} issues written to {", ".join(outputs.values())}')
+    return count
+
+
+def read_scan_metrics(result_file: str) -> dict:
+    with open(result_file, 'rb') as f:
+        return next(ijson.items(f, 'audit_result.scan_metrics', use_float=True), {})
+
+
+def iter_result_issues(result_file: str) -> Iterator[dict]:
+    with open(result_file, 'rb') as f:
+        yield from ijson.items(f, 'audit_result.issues.item', use_float=True)
+
+
+def convert_audit_result(result_file: str, formats: list[str]) -> dict[str, str]:
+    """Converts the audit_result file to the formats, the outputs are placed next to it."""
+    base_name = result_file[:-len('.json')] if result_file.endswith('.json') else result_file
+    outputs = {output_format: f'{base_name}.{WRITERS[output_format].extension}' for output_format in formats}
+    write_formats(issues=iter_result_issues(result_file), outputs=outputs,
+                  scan_metrics=read_scan_metrics(result_file))
+    return outputs
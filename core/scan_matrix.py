@@ -0,0 +1,159 @@
+"""Several scan profiles and report templates for one target.
+
+The target and its configuration are set up once by the caller. In the gated mode the profiles run one by one
+in the given order [quick ones first] and the rest is skipped as soon as a scan finds nothing above
+informational. In the parallel mode the profiles run at the same time, max_parallel at most.
+"""
+import os
+import time
+
+from api.base import AcunetixAPI
+from api.classes.report import AcunetixReport
+from api.classes.scan import AcunetixScan
+from api.classes.scan_status import AcunetixScanStatuses
+from api.classes.target import AcunetixTarget
+from api.constants import ProfileIds, ReportTemplateIds
+from core import report_cache
+from core.report_cache import ReportCache
+from core.scan_progress import ScanProgressStream
+from core.tools import timed_print
+from core.watchdog import Watchdog, WatchedJob, abort_scan
+
+MATRIX_MODES = ['gated', 'parallel']
+
+
+class MatrixScan:
+    def __init__(self, profile: ProfileIds):
+        self.profile = profile
+        self.scan: AcunetixScan | None = None
+        self.watched: WatchedJob | None = None
+        self.skipped = False
+        self.reports: list[dict] = []
+
+    @property
+    def status(self) -> str | None:
+        return self.scan.current_session.status if self.scan else None
+
+    @property
+    def is_clean(self) -> bool:
+        severity_counts = (self.scan.current_session.severity_counts or {}) if self.scan else {}
+        return not any(count for level, count in severity_counts.items() if level != 'info')
+
+    def to_dict(self) -> dict:
+        return {
+            'profile': self.profile.name,
+            'scan_id': self.scan.scan_id if self.scan else None,
+            'status': self.status,
+            'scan_date': self.scan.current_session.start_date if self.scan else None,
+            'severity_counts': self.scan.current_session.severity_counts if self.scan else None,
+            'skipped': self.skipped,
+            'timed_out': bool(self.watched and self.watched.expired.is_set()),
+            'abort_failed': bool(self.watched and self.watched.timeout_failed),
+            'reports': self.reports,
+        }
+
+
+class ScanMatrix:
+    def __init__(self, api: AcunetixAPI, target: AcunetixTarget,
+                 profiles: list[ProfileIds], templates: list[ReportTemplateIds],
+                 mode: str = 'gated', max_parallel: int = 0, directory: str = '.',
+                 cache: ReportCache | None = None, interval: float = 10, watchdog: Watchdog | None = None):
+        self.api = api
+        self.target = target
+        self.templates = templates or [ReportTemplateIds.COMPREHENSIVE]
+        self.mode = mode
+        self.max_parallel = max_parallel
+        self.directory = directory
+        self.cache = cache
+        self.interval = interval
+        self.watchdog = watchdog or Watchdog()  # deadlines are enforced only when the watchdog is started
+        self.scans = [MatrixScan(profile=profile) for profile in profiles]
+
+    def start(self, matrix_scan: MatrixScan) -> ScanProgressStream:
+        matrix_scan.scan = self.api.run_scan(target_id=self.target.target_id,
+                                             profile_id=matrix_scan.profile.value,
+                                             report_template_id=self.templates[0].value)
+        timed_print(f'{matrix_scan.scan} with the profile {matrix_scan.profile.name} was created successfully.')
+        stream = ScanProgressStream(api=self.api, scan_id=matrix_scan.scan.scan_id, interval=self.interval)
+        matrix_scan.watched = self.watchdog.watch_scan(stream, on_timeout=lambda: abort_scan(api=self.api,
+                                                                                             stream=stream))
+        return stream
+
+    def finish(self, matrix_scan: MatrixScan, stream: ScanProgressStream):
+        self.watchdog.done(matrix_scan.watched.key)
+        matrix_scan.scan = stream.scan
+        timed_print(f'Scan with the profile {matrix_scan.profile.name} ended with status: {matrix_scan.status}.')
+        if matrix_scan.status == AcunetixScanStatuses.COMPLETED.value:
+            matrix_scan.reports = [self.generate_report(matrix_scan, template) for template in self.templates]
+
+    def find_scan_report(self, matrix_scan: MatrixScan, template: ReportTemplateIds) -> AcunetixReport | None:
+        reports = [
+            report for report in self.api.get_reports(target_id=matrix_scan.scan.current_session.scan_session_id)
+            if report.template_id == template.value
+        ]
+        return reports[-1] if reports else None
+
+    def generate_report(self, matrix_scan: MatrixScan, template: ReportTemplateIds) -> dict:
+        session_id = matrix_scan.scan.current_session.scan_session_id
+        watched = self.watchdog.watch(key=f'Report {template.name} of {session_id}',
+                                      timeout=self.watchdog.limits.report_timeout)
+        report = None
+        if template == self.templates[0]:
+            # requested by run_scan, Acunetix generates it itself once the scan is completed
+            while not (report := self.find_scan_report(matrix_scan, template)):
+                if watched.expired.wait(self.interval):
+                    break
+        if not report and not watched.expired.is_set():
+            report = self.api.run_scan_report(scan_id=session_id, template_id=template.value)
+        while report and report.status in [AcunetixScanStatuses.PROCESSING.value, AcunetixScanStatuses.QUEUED.value]:
+            if watched.expired.wait(self.interval):
+                break
+            report = self.api.get_report(report_id=report.report_id)
+        self.watchdog.done(watched.key)
+        if not report:
+            return {'template': template.name, 'report_id': None, 'status': None}
+        result = {'template': template.name, 'report_id': report.report_id, 'status': report.status,
+                  'generation_date': report.generation_date}
+        if report.status == AcunetixScanStatuses.COMPLETED.value:
+            file_name = f'{matrix_scan.profile.name.lower()}_{template.name.lower()}_{report.download_html_name}'
+            result['report_file'] = report_cache.get_report(
+                cache=self.cache, report_id=report.report_id, file_name=file_name, directory=self.directory,
+                download=lambda output_file: self.api.download_report_to_file(descriptor=report.download_html_name,
+                                                                              output_file=output_file),
+            )
+        return result
+
+    def run_gated(self):
+        for index, matrix_scan in enumerate(self.scans):
+            stream = self.start(matrix_scan)
+            stream.run()
+            self.finish(matrix_scan, stream)
+            if matrix_scan.status == AcunetixScanStatuses.COMPLETED.value and matrix_scan.is_clean:
+                for skipped_scan in self.scans[index + 1:]:
+                    skipped_scan.skipped = True
+                    timed_print(f'Nothing found by {matrix_scan.profile.name}. '
+                                f'Skip the profile {skipped_scan.profile.name}.')
+                return
+
+    def run_parallel(self):
+        waiting = list(self.scans)
+        running: dict[ScanProgressStream, MatrixScan] = {}
+        while waiting or running:
+            while waiting and (not self.max_parallel or len(running) < self.max_parallel):
+                matrix_scan = waiting.pop(0)
+                running[self.start(matrix_scan)] = matrix_scan
+            for stream, matrix_scan in list(running.items()):
+                stream.poll()
+                if stream.is_finished or stream.is_stopped:
+                    del running[stream]
+                    self.finish(matrix_scan, stream)
+            if running:
+                time.sleep(self.interval)
+
+    def run(self) -> list[dict]:
+        os.makedirs(self.directory, exist_ok=True)
+        if self.mode == 'parallel':
+            self.run_parallel()
+        else:
+            self.run_gated()
+        return [matrix_scan.to_dict() for matrix_scan in self.scans]
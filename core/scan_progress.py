@@ -0,0 +1,139 @@
+"""Scan progress as a stream of typed events.
+
+One ``ScanProgressStream`` polls the scan and turns the difference between two consecutive
+``AcunetixScanSession`` states into events. Any amount of consumers can subscribe to the same stream,
+so the server is polled once no matter how many dashboards or loggers listen to it.
+"""
+import asyncio
+import enum
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterator
+
+from api.base import AcunetixAPI
+from api.classes.scan import AcunetixScan, AcunetixScanSession
+from api.classes.scan_status import FINAL_ACUNETIX_STATUSES
+
+
+class ScanEventKinds(enum.Enum):
+    STATUS = 'status'
+    PROGRESS = 'progress'
+    THREAT = 'threat'
+    SEVERITY_COUNTS = 'severity_counts'
+
+
+class ScanEvent:
+    def __init__(self,
+                 kind: ScanEventKinds,
+                 scan_id: str,
+                 previous,
+                 current,
+                 delta=None):
+        self.kind = kind
+        self.scan_id = scan_id
+        self.previous = previous
+        self.current = current
+        self.delta = delta
+        self.created = datetime.now()
+
+    def __str__(self) -> str:
+        return f'Scan {self.scan_id} {self.kind.value}: {self.previous} -> {self.current}'
+
+    def to_dict(self) -> dict:
+        return {
+            'kind': self.kind.value,
+            'scan_id': self.scan_id,
+            'previous': self.previous,
+            'current': self.current,
+            'delta': self.delta,
+            'created': self.created.isoformat(),
+        }
+
+
+def severity_counts_delta(previous: dict | None, current: dict | None) -> dict:
+    previous, current = previous or {}, current or {}
+    return {
+        level: count - previous.get(level, 0)
+        for level, count in current.items()
+        if count != previous.get(level, 0)
+    }
+
+
+def diff_sessions(scan_id: str, previous: AcunetixScanSession | None,
+                  current: AcunetixScanSession) -> list[ScanEvent]:
+    events = []
+    if previous is None or previous.status != current.status:
+        events.append(ScanEvent(kind=ScanEventKinds.STATUS, scan_id=scan_id,
+                                previous=previous.status if previous else None, current=current.status))
+    if previous is None or previous.progress != current.progress:
+        events.append(ScanEvent(kind=ScanEventKinds.PROGRESS, scan_id=scan_id,
+                                previous=previous.progress if previous else None, current=current.progress))
+    if previous is not None and previous.threat != current.threat:
+        events.append(ScanEvent(kind=ScanEventKinds.THREAT, scan_id=scan_id,
+                                previous=previous.threat, current=current.threat))
+    previous_counts = previous.severity_counts if previous else None
+    if delta := severity_counts_delta(previous_counts, current.severity_counts):
+        events.append(ScanEvent(kind=ScanEventKinds.SEVERITY_COUNTS, scan_id=scan_id,
+                                previous=previous_counts, current=current.severity_counts, delta=delta))
+    return events
+
+
+class ScanProgressStream:
+    def __init__(self, api: AcunetixAPI, scan_id: str, interval: float = 10):
+        self.api = api
+        self.scan_id = scan_id
+        self.interval = interval
+        self.scan: AcunetixScan | None = None
+        self._subscribers: list[Callable[[ScanEvent], None]] = []
+        self._stopped = threading.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return bool(self.scan) and self.scan.current_session.status in FINAL_ACUNETIX_STATUSES
+
+    @property
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def stop(self):
+        """Ends the iteration without waiting for the scan, safe to call from another thread."""
+        self._stopped.set()
+
+    def subscribe(self, callback: Callable[[ScanEvent], None]) -> Callable[[ScanEvent], None]:
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[ScanEvent], None]):
+        self._subscribers.remove(callback)
+
+    def poll(self) -> list[ScanEvent]:
+        """Requests the scan once and notifies the subscribers about everything that changed."""
+        scan = self.api.get_scan(scan_id=self.scan_id)
+        events = diff_sessions(scan_id=self.scan_id,
+                               previous=self.scan.current_session if self.scan else None,
+                               current=scan.current_session)
+        self.scan = scan
+        for event in events:
+            for callback in list(self._subscribers):
+                callback(event)
+        return events
+
+    def run(self) -> AcunetixScan:
+        """Polls until the scan is finished or stopped, the events are delivered to the subscribers only."""
+        for _ in self:
+            pass
+        return self.scan
+
+    def __iter__(self) -> Iterator[ScanEvent]:
+        while True:
+            yield from self.poll()
+            if self.is_finished or self._stopped.wait(self.interval):
+                return
+
+    async def __aiter__(self) -> AsyncIterator[ScanEvent]:
+        while True:
+            for event in await asyncio.to_thread(self.poll):
+                yield event
+            if self.is_finished or self.is_stopped:
+                return
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,454 @@
+"""Separately invokable pipeline stages.
+
+Every stage reads a JSON document ``{"jobs": [...]}`` produced by the previous stage and emits the same
+document enriched with its own results, so the stages can be chained through files, pipes or a queue:
+
+    submit -> wait -> fetch -> parse -> cleanup
+
+Human-readable progress goes to stderr, stdout is reserved for the JSON document.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from urllib.parse import ParseResult, urlparse
+
+import requests
+from selenium.common.exceptions import WebDriverException
+
+from api.base import AcunetixAPI
+from api.cluster import AcunetixCluster, AcunetixInstance
+from api.classes.scan_status import FINAL_ACUNETIX_STATUSES, AcunetixScanStatuses
+from api.classes.target import AcunetixTarget
+from api.constants import ExportTypes
+from core import report_cache, report_writers, vulnerability_ingest
+from core.browser_pool import BrowserPool
+from core.garbage_collector import GarbageCollector
+from core.report_cache import ReportCache
+from core.scan_progress import ScanProgressStream
+from core.tools import timed_print
+from core.watchdog import TimeLimits, Watchdog, abort_scan
+
+# a failed request of one job is recorded in the job, the other jobs are still processed
+API_ERRORS = (requests.exceptions.RequestException, json.decoder.JSONDecodeError)
+
+
+def read_jobs(source: str | None) -> list[dict]:
+    if not source:
+        return []
+    if source == '-':
+        return json.load(sys.stdin).get('jobs', [])
+    with open(source, 'r') as f:
+        return json.load(f).get('jobs', [])
+
+
+def write_jobs(jobs: list[dict], destination: str, stream=None):
+    document = {'jobs': jobs}
+    if destination == '-':
+        stream = stream or sys.stdout
+        json.dump(document, stream, indent=4)
+        stream.write('\n')
+        stream.flush()
+        return
+    with open(destination, 'w') as f:
+        json.dump(document, f, indent=4)
+
+
+def init_cluster(arguments: Namespace) -> AcunetixCluster:
+    instances = arguments.instances.split(',') if arguments.instances else [f'{arguments.host}:{arguments.port}']
+    return AcunetixCluster(
+        username=arguments.username,
+        password=arguments.password,
+        instances=instances,
+        secure=arguments.secure,
+        max_scans_per_instance=arguments.max_scans,
+        rate_limit=arguments.rate_limit,
+        endpoint_rate_limits=dict(arguments.endpoint_rate_limit),
+    )
+
+
+def init_cache(arguments: Namespace) -> ReportCache | None:
+    if not arguments.cache_dir:
+        return None
+    return ReportCache(directory=arguments.cache_dir, max_bytes=arguments.cache_size * 1024 * 1024)
+
+
+def init_watchdog(arguments: Namespace) -> Watchdog:
+    return Watchdog(limits=TimeLimits(queued_minutes=arguments.queued_timeout, scan_minutes=arguments.scan_timeout,
+                                      report_minutes=arguments.report_timeout),
+                    retries=arguments.abort_retries)
+
+
+def group_jobs_by_instance(jobs: list[dict]) -> dict[str | None, list[dict]]:
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.get('instance'), []).append(job)
+    return groups
+
+
+def get_instance_api(cluster: AcunetixCluster, instance: str | None, jobs: list[dict]) -> AcunetixAPI | None:
+    """API of the instance the jobs belong to. When it is not available the jobs are failed instead."""
+    try:
+        return cluster.get(instance)
+    except requests.exceptions.ConnectionError as e:
+        for job in jobs:
+            job['error'] = f'Instance unavailable: {e}'
+        timed_print(f'Skip {len(jobs)} job(s). Instance unavailable: {e}')
+        return None
+
+
+def configure_proxy(cluster: AcunetixCluster, jobs: list[dict], proxy: ParseResult):
+    """Sets the proxy of all targets of an instance at once, failed targets are marked in their jobs."""
+    for instance_key, instance_jobs in group_jobs_by_instance(jobs).items():
+        if not (api := get_instance_api(cluster=cluster, instance=instance_key, jobs=instance_jobs)):
+            continue
+        errors = api.configure_targets(target_ids=[job['target_id'] for job in instance_jobs],
+                                       configuration=api.proxy_configuration(host=str(proxy.hostname),
+                                                                             port=proxy.port,
+                                                                             protocol=proxy.scheme))
+        for job in instance_jobs:
+            if error := errors.get(job['target_id']):
+                timed_print(f'Proxy settings of the target {job["target_id"]} have not been changed. {error}')
+                job['error'] = f'proxy: {error}'
+
+
+def place_jobs(cluster: AcunetixCluster, jobs: list[dict]) -> list[tuple[dict, AcunetixInstance, AcunetixTarget]]:
+    """Creates targets for the jobs while the instances have free slots, placed jobs are removed from the list."""
+    placed = []
+    while jobs and cluster.free_slots != 0:
+        job = jobs.pop(0)
+        job.pop('error', None)  # retried after an earlier failed placement
+        try:
+            instance, target = cluster.place(job['address'])
+        except requests.exceptions.RequestException as e:
+            job['error'] = f'Target was not created: {e}'
+            timed_print(job['error'])
+            continue
+        job.update({'instance': instance.key, 'target_id': target.target_id})
+        placed.append((job, instance, target))
+    return placed
+
+
+def submit(arguments: Namespace, jobs: list[dict]) -> list[dict]:
+    jobs.extend({'address': address} for address in arguments.address)
+    cluster = init_cluster(arguments)
+    proxy = urlparse(arguments.proxy) if arguments.proxy else None
+    # a target without a scan has failed, see its error
+    new_jobs = [job for job in jobs if not job.get('scan_id') and not job.get('target_id')]
+    while new_jobs:
+        while cluster.free_slots == 0 and cluster.healthy_instances:
+            timed_print('All instances are busy. Wait for free slots')
+            time.sleep(60)
+            cluster.refresh()
+        if not cluster.healthy_instances:
+            for job in new_jobs:
+                job['error'] = 'Target was not created: no healthy instance is available'
+            timed_print(f'No healthy instance is available. {len(new_jobs)} job(s) were not submitted')
+            break
+        placed = place_jobs(cluster=cluster, jobs=new_jobs)
+        if proxy:  # all new targets at once and before any of their scans starts
+            configure_proxy(cluster=cluster, jobs=[job for job, _, _ in placed], proxy=proxy)
+        for job, instance, target in placed:
+            if job.get('error'):
+                cluster.release(instance.key)
+                continue
+            try:
+                scan = cluster.start_scan(instance=instance, target=target)
+            except requests.exceptions.RequestException as e:
+                job['error'] = f'Scan was not started: {e}'
+                timed_print(job['error'])
+                continue
+            timed_print(f'The scan: {scan.scan_id} was created successfully.')
+            job['scan_id'] = scan.scan_id
+    cluster.close_session()
+    return jobs
+
+
+def wait(arguments: Namespace, jobs: list[dict]) -> list[dict]:
+    cluster = init_cluster(arguments)
+    streams = {}
+    for job in jobs:
+        if not job.get('scan_id') or job.get('status') in FINAL_ACUNETIX_STATUSES:
+            continue
+        if api := get_instance_api(cluster=cluster, instance=job.get('instance'), jobs=[job]):
+            streams[job['scan_id']] = ScanProgressStream(api=api, scan_id=job['scan_id'])
+    for stream in streams.values():
+        stream.subscribe(lambda event: timed_print(str(event)))
+    pending = [job for job in jobs if job.get('scan_id') in streams]
+    with init_watchdog(arguments) as watchdog:
+        watched = {job['scan_id']: watch_scan(watchdog=watchdog, cluster=cluster, stream=streams[job['scan_id']],
+                                              instance=job.get('instance'))
+                   for job in pending}
+        while pending:
+            for job in list(pending):
+                stream = streams[job['scan_id']]
+                if watched[job['scan_id']].expired.is_set():
+                    if watched[job['scan_id']].timeout_failed:  # still tracked by the job, the next wait polls it
+                        job['error'] = (f'The scan exceeded its deadline with status: {job.get("status")}, but it was '
+                                        'not aborted and still runs on the instance.')
+                    else:
+                        job['error'] = (f'The scan exceeded its deadline with status: {job.get("status")} '
+                                        'and was aborted.')
+                    timed_print(job['error'])
+                    pending.remove(job)
+                    continue
+                try:
+                    stream.poll()
+                except API_ERRORS as e:
+                    job['error'] = f'Scan status was not received: {e}'
+                    timed_print(job['error'])
+                    watchdog.done(job['scan_id'])
+                    pending.remove(job)
+                    continue
+                job.pop('error', None)
+                job.update({
+                    'status': stream.scan.current_session.status,
+                    'scan_session_id': stream.scan.current_session.scan_session_id,
+                    'scan_date': stream.scan.current_session.start_date,
+                })
+                if stream.is_finished:
+                    watchdog.done(job['scan_id'])
+                    timed_print(f'{stream.scan} ended with status: {stream.scan.current_session.status.title()}.')
+                    pending.remove(job)
+            if pending:
+                timed_print(f'Scans still running: {len(pending)}')
+                time.sleep(arguments.interval)
+    cluster.close_session()
+    return jobs
+
+
+def watch_scan(watchdog: Watchdog, cluster: AcunetixCluster, stream: ScanProgressStream, instance: str | None):
+    """Aborts the scan once it exceeds its deadline and frees its slot on the instance."""
+    release = (lambda: cluster.release(instance)) if instance else None
+    return watchdog.watch_scan(stream, on_timeout=lambda: abort_scan(api=stream.api, stream=stream, release=release))
+
+
+def fetch(arguments: Namespace, jobs: list[dict]) -> list[dict]:
+    cluster = init_cluster(arguments)
+    # reports evicted from the cache since the previous fetch are downloaded again
+    pending = [
+        job for job in jobs
+        if job.get('status') == AcunetixScanStatuses.COMPLETED.value
+        and not (job.get('report_file') and os.path.exists(job['report_file']))
+    ]
+    cache = init_cache(arguments)
+    with init_watchdog(arguments) as watchdog:
+        for instance, group in group_jobs_by_instance(pending).items():
+            if not (api := get_instance_api(cluster=cluster, instance=instance, jobs=group)):
+                continue
+            if arguments.result_source == 'export':
+                fetch_exports(api=api, directory=arguments.directory, jobs=group, cache=cache, watchdog=watchdog)
+            elif arguments.result_source in ['vulnerabilities', 'live']:  # scans are already finished here
+                fetch_vulnerabilities(api=api, directory=arguments.directory, with_evidence=arguments.with_evidence,
+                                      jobs=group)
+            else:
+                fetch_reports(api=api, directory=arguments.directory, interval=arguments.interval, jobs=group,
+                              cache=cache, watchdog=watchdog)
+    cluster.close_session()
+    return jobs
+
+
+def fetch_report_file(job: dict, cache: ReportCache | None, report_id: str, file_name: str, directory: str,
+                      download: Callable[[str], str]):
+    try:
+        job['report_file'] = report_cache.get_report(cache=cache, report_id=report_id, file_name=file_name,
+                                                     directory=directory, download=download)
+    except (*API_ERRORS, OSError) as e:
+        job['error'] = f'Report {report_id} was not downloaded: {e}'
+        timed_print(job['error'])
+        return
+    job.pop('error', None)
+
+
+def fetch_exports(api: AcunetixAPI, directory: str, jobs: list[dict], cache: ReportCache | None = None,
+                  watchdog: Watchdog | None = None):
+    watchdog = watchdog or Watchdog()
+    exports = {}
+    for job in jobs:
+        try:
+            exports[job['scan_session_id']] = api.run_scan_export(scan_id=job['scan_session_id'],
+                                                                  export_id=ExportTypes.JSON.value)
+        except API_ERRORS as e:
+            job['error'] = f'Export was not started: {e}'
+            timed_print(job['error'])
+    watched = {
+        session_id: watchdog.watch(key=f'Export {export.report_id}', timeout=watchdog.limits.report_timeout)
+        for session_id, export in exports.items()
+    }
+    for job in jobs:
+        if job['scan_session_id'] not in exports:
+            continue
+        try:
+            export = api.wait_for_export(export_id=exports[job['scan_session_id']].report_id,
+                                         expired=watched[job['scan_session_id']].expired)
+        except API_ERRORS as e:
+            job['error'] = f'Export status was not received: {e}'
+            timed_print(job['error'])
+            continue
+        finally:
+            watchdog.done(watched[job['scan_session_id']].key)
+        job.update({'report_id': export.report_id, 'report_date': export.generation_date})
+        if export.status != AcunetixScanStatuses.COMPLETED.value:
+            job['error'] = f'Error while generating export. API response of export status: {export.status}.'
+            timed_print(job['error'])
+            continue
+        fetch_report_file(job=job, cache=cache, report_id=export.report_id, file_name=export.download_name,
+                          directory=directory,
+                          download=lambda report_file: api.download_export(export=export, output_file=report_file))
+
+
+def fetch_vulnerabilities(api: AcunetixAPI, directory: str, with_evidence: bool, jobs: list[dict]):
+    """The audit result is built right away, so there is nothing left for the parse stage."""
+    for job in jobs:
+        result_file = os.path.abspath(os.path.join(directory, f'{job["scan_session_id"]}_audit_result.json'))
+        try:
+            vulnerability_ingest.ingest_scan_results(api=api, scan=api.get_scan(scan_id=job['scan_id']),
+                                                     output_file=result_file, with_evidence=with_evidence)
+        except API_ERRORS as e:
+            job['error'] = f'Vulnerabilities were not received: {e}'
+            timed_print(job['error'])
+            continue
+        job.pop('error', None)
+        job['result_file'] = result_file
+
+
+def fetch_reports(api: AcunetixAPI, directory: str, interval: int, jobs: list[dict],
+                  cache: ReportCache | None = None, watchdog: Watchdog | None = None):
+    watchdog = watchdog or Watchdog()
+    watched = {
+        job['scan_session_id']: watchdog.watch(key=f'Report of {job["scan_session_id"]}',
+                                               timeout=watchdog.limits.report_timeout)
+        for job in jobs
+    }
+    pending = list(jobs)
+    while pending:
+        for job in list(pending):
+            if watched[job['scan_session_id']].expired.is_set():
+                job['error'] = f'Report was not generated in {watchdog.limits.report_minutes} minutes.'
+                timed_print(job['error'])
+                pending.remove(job)
+                continue
+            try:
+                reports = api.get_reports(target_id=job['scan_session_id'])
+            except API_ERRORS as e:
+                job['error'] = f'Report status was not received: {e}'
+                timed_print(job['error'])
+                pending.remove(job)
+                watchdog.done(watched[job['scan_session_id']].key)
+                continue
+            if not reports:
+                continue
+            report = reports[-1]  # get only one report
+            if report.status in [AcunetixScanStatuses.PROCESSING.value, AcunetixScanStatuses.QUEUED.value]:
+                continue
+            pending.remove(job)
+            watchdog.done(watched[job['scan_session_id']].key)
+            job.update({'report_id': report.report_id, 'report_date': report.generation_date})
+            if report.status != AcunetixScanStatuses.COMPLETED.value:
+                job['error'] = f'Error while generating report. API response of report status: {report.status}.'
+                timed_print(job['error'])
+                continue
+            fetch_report_file(job=job, cache=cache, report_id=report.report_id, file_name=report.download_html_name,
+                              directory=directory,
+                              download=lambda report_file: api.download_report_to_file(
+                                  descriptor=report.download_html_name, output_file=report_file))
+        if pending:
+            timed_print(f'Reports still generating: {len(pending)}')
+            time.sleep(interval)
+
+
+def parse_job(job: dict, directory: str, formats: list[str], cache: ReportCache | None,
+              browser_pool: BrowserPool | None, render: bool = True):
+    if job.get('report_file') and not job.get('result_file'):
+        if not os.path.exists(job['report_file']):
+            job['error'] = f'Report {job["report_file"]} was evicted from the cache. Run fetch to download it again.'
+            timed_print(job['error'])
+            return
+        name = job.get('report_id') or os.path.splitext(os.path.basename(job['report_file']))[0]
+        result_file = os.path.abspath(os.path.join(directory, f'{name}_audit_result.json'))
+        try:
+            job['result_file'] = report_cache.parse_downloaded_report(report_file=job['report_file'],
+                                                                      output_file=result_file, cache=cache,
+                                                                      browser_pool=browser_pool, render=render,
+                                                                      target=job.get('address'),
+                                                                      scan_date=job.get('scan_date')
+                                                                      or job.get('report_date'))
+        except WebDriverException as e:  # timed out or crashed page, the other jobs are still parsed
+            job['error'] = f'Report {job["report_file"]} was not rendered: {e.msg or type(e).__name__}'
+            timed_print(job['error'])
+            return
+    formats = [output_format for output_format in formats if output_format not in job.get('converted_files', {})]
+    if job.get('result_file') and formats:
+        converted_files = report_writers.convert_audit_result(result_file=job['result_file'], formats=formats)
+        job.setdefault('converted_files', {}).update(converted_files)
+
+
+def parse(arguments: Namespace, jobs: list[dict]) -> list[dict]:
+    cache = init_cache(arguments)
+    # browsers start lazily, so exports-only runs do not start any
+    with BrowserPool(size=arguments.browsers, max_pages=arguments.browser_max_pages,
+                     max_memory_mb=arguments.browser_max_memory, page_timeout=arguments.page_timeout) as browser_pool:
+        with ThreadPoolExecutor(max_workers=arguments.browsers) as executor:
+            list(executor.map(lambda job: parse_job(job=job, directory=arguments.directory,
+                                                    formats=arguments.formats, cache=cache,
+                                                    browser_pool=browser_pool,
+                                                    render=not arguments.pre_rendered), jobs))
+    return jobs
+
+
+def cleanup(arguments: Namespace, jobs: list[dict]) -> list[dict]:
+    cluster = init_cluster(arguments)
+    for job in jobs:
+        if job.get('cleaned'):
+            continue
+        if not (api := get_instance_api(cluster=cluster, instance=job.get('instance'), jobs=[job])):
+            continue
+        responses = []
+        try:
+            if job.get('target_id'):
+                responses.append(api.delete_target_by_id(target_id=job['target_id']))
+            if job.get('report_id'):
+                responses.append(api.delete_report_by_id(report_id=job['report_id']))
+        except API_ERRORS as e:
+            job['error'] = f'Cleanup failed: {e}'
+            timed_print(job['error'])
+            continue
+        # 404 means the object is already gone [garbage collection, an earlier partial run]
+        failed = [response for response in responses if response is not None
+                  and response.status_code not in [200, 204, 404]]
+        if failed:
+            job['error'] = f'Cleanup failed with status: {", ".join(str(r.status_code) for r in failed)}.'
+            timed_print(job['error'])
+            continue
+        job['cleaned'] = True
+    timed_print('Jobs data removed')
+    if arguments.stale_hours is not None:
+        for instance in cluster.healthy_instances:
+            timed_print(f'Collecting stale data on the instance {instance}')
+            GarbageCollector(api=instance.api, max_age_hours=arguments.stale_hours).collect()
+    cluster.close_session()
+    return jobs
+
+
+STAGES = {
+    'submit': submit,
+    'wait': wait,
+    'fetch': fetch,
+    'parse': parse,
+    'cleanup': cleanup,
+}
+
+
+def run_stage(arguments: Namespace) -> list[dict]:
+    jobs = read_jobs(arguments.input)
+    stdout = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            jobs = STAGES[arguments.command](arguments, jobs)
+    finally:  # the stages update the jobs in place, so a failed stage still passes on what it has done
+        write_jobs(jobs, arguments.output_file, stream=stdout)
+    return jobs
@@ -0,0 +1,55 @@
+"""Builds the audit_result straight from the scan session vulnerabilities, without generating a report.
+
+The list endpoint already has the severity, name and url of every vulnerability, which is enough for
+summary-only runs. The evidence (details, request and response) needs one more request per vulnerability,
+so it is fetched only on demand, concurrently and with a bounded amount of workers.
+"""
+from api.base import AcunetixAPI
+from api.classes.scan import AcunetixScan
+from api.classes.vulnerability import AcunetixVulnerability
+from core.audit_result import count_severities, init_issue, init_store, save_store, to_severity
+from core.tools import timed_print
+
+
+def to_issue(vulnerability: AcunetixVulnerability) -> dict:
+    return init_issue(
+        severity=to_severity(vulnerability.severity),
+        name=vulnerability.vt_name,
+        url=vulnerability.affects_url,
+        description=vulnerability.details or vulnerability.description,
+        request=vulnerability.request,
+        response=vulnerability.response,
+    )
+
+
+def get_issues(api: AcunetixAPI, scan: AcunetixScan, with_evidence: bool = False,
+               max_workers: int = 8) -> list[dict]:
+    scan_id, result_id = scan.scan_id, scan.current_session.scan_session_id
+    vulnerabilities = list(api.iter_scan_vulnerabilities(scan_id=scan_id, result_id=result_id))
+    timed_print(f'Vulnerabilities received. Amount: {len(vulnerabilities)}')
+    if with_evidence:
+        vulnerabilities = api.get_scan_vulnerabilities_details(scan_id=scan_id, result_id=result_id,
+                                                               vulnerabilities=vulnerabilities,
+                                                               max_workers=max_workers)
+        timed_print('Vulnerabilities evidence received.')
+    return [to_issue(vulnerability) for vulnerability in vulnerabilities]
+
+
+def save_issues(scan: AcunetixScan, issues: list[dict], output_file: str) -> dict:
+    store = init_store()
+    store['audit_result']['scan_metrics'].update({
+        'target': scan.target.address,
+        'scan_date': scan.current_session.start_date,
+        'vuln_instances_total': str(len(issues)),
+    })
+    store['audit_result']['issues'] = issues
+    store['audit_result']['stats'] = count_severities(issues)
+    save_store(store=store, output_file=output_file)
+    timed_print(f'Results saved to {output_file}')
+    return store
+
+
+def ingest_scan_results(api: AcunetixAPI, scan: AcunetixScan, output_file: str,
+                        with_evidence: bool = False, max_workers: int = 8) -> dict:
+    issues = get_issues(api=api, scan=scan, with_evidence=with_evidence, max_workers=max_workers)
+    return save_issues(scan=scan, issues=issues, output_file=output_file)
@@ -0,0 +1,187 @@
+"""Deadlines of the in-flight scans, reports and exports.
+
+One ``Watchdog`` thread checks the deadlines of all watched jobs. When a deadline passes, the timeout
+action of the job [abort the scan, release the slot] runs with retries and then the job is marked expired.
+The wait loops only check ``WatchedJob.expired``, so a scan stuck in queued or a report stuck in processing
+no longer holds a worker slot forever. ``WatchedJob.timeout_failed`` tells them the action did not succeed,
+e.g. the scan could not be aborted and still runs on the service.
+"""
+import threading
+import time
+from typing import Callable
+
+import requests
+
+from api.base import AcunetixAPI
+from api.classes.scan import AcunetixScan
+from api.classes.scan_status import AcunetixScanStatuses
+from core.scan_progress import ScanEvent, ScanEventKinds, ScanProgressStream
+from core.tools import timed_print
+
+WAITING_STATUSES = [None, AcunetixScanStatuses.SCHEDULED.value, AcunetixScanStatuses.QUEUED.value]
+
+
+class TimeLimits:
+    def __init__(self, queued_minutes: float = 60, scan_minutes: float = 0, report_minutes: float = 30,
+                 grace_minutes: float = 5):
+        """Deadlines of every stage, 0 means unlimited.
+
+        Args:
+            queued_minutes: How long a scan may wait in the queue.
+            scan_minutes: How long a scan may run when its max_scan_time is not set.
+            report_minutes: How long a report or an export may be generated.
+            grace_minutes: Added to max_scan_time, the service needs time to stop the scan itself.
+
+        """
+
+        self.queued_minutes = queued_minutes
+        self.scan_minutes = scan_minutes
+        self.report_minutes = report_minutes
+        self.grace_minutes = grace_minutes
+
+    @property
+    def queued_timeout(self) -> float:
+        return self.queued_minutes * 60
+
+    @property
+    def report_timeout(self) -> float:
+        return self.report_minutes * 60
+
+    def scan_timeout(self, scan: AcunetixScan | None) -> float:
+        if scan and scan.max_scan_time:
+            return (scan.max_scan_time + self.grace_minutes) * 60
+        return self.scan_minutes * 60
+
+    def timeout(self, scan: AcunetixScan | None) -> float:
+        if scan is None or scan.current_session.status in WAITING_STATUSES:
+            return self.queued_timeout
+        return self.scan_timeout(scan)
+
+
+class WatchedJob:
+    def __init__(self, key: str, timeout: float = 0, on_timeout: Callable[[], bool | None] | None = None,
+                 on_failure: Callable[[], None] | None = None):
+        self.key = key
+        self.on_timeout = on_timeout
+        self.on_failure = on_failure
+        self.expired = threading.Event()
+        self.timeout_failed = False
+        self.deadline: float | None = None
+        self.reset(timeout)
+
+    def reset(self, timeout: float):
+        """Starts the deadline over, 0 removes it."""
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def is_overdue(self, now: float) -> bool:
+        return self.deadline is not None and now >= self.deadline
+
+
+class Watchdog:
+    def __init__(self, limits: TimeLimits | None = None, interval: float = 5, retries: int = 3):
+        self.limits = limits or TimeLimits()
+        self.interval = interval
+        self.retries = retries
+        self._jobs: dict[str, WatchedJob] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def watch(self, key: str, timeout: float = 0, on_timeout: Callable[[], bool | None] | None = None,
+              on_failure: Callable[[], None] | None = None) -> WatchedJob:
+        """Watches the job until done is called.
+
+        Args:
+            key: The job identifier [scan ID, report ID].
+            timeout: Seconds until the job expires, 0 for no deadline.
+            on_timeout: Called once the job expires, False or an exception means a failure and it is retried.
+            on_failure: Called when on_timeout has failed every retry.
+
+        """
+
+        job = WatchedJob(key=key, timeout=timeout, on_timeout=on_timeout, on_failure=on_failure)
+        with self._lock:
+            self._jobs[key] = job
+        return job
+
+    def watch_scan(self, stream: ScanProgressStream,
+                   on_timeout: Callable[[], bool | None] | None = None) -> WatchedJob:
+        """The queued limit applies until the scan starts, then the scan limit starts over.
+        When the timeout action keeps failing the stream is stopped anyway, see WatchedJob.timeout_failed.
+        """
+        job = self.watch(key=stream.scan_id, timeout=self.limits.timeout(stream.scan), on_timeout=on_timeout,
+                         on_failure=stream.stop)
+
+        @stream.subscribe
+        def reset_deadline(event: ScanEvent):
+            if event.kind == ScanEventKinds.STATUS and event.previous in WAITING_STATUSES:
+                job.reset(self.limits.timeout(stream.scan))
+
+        return job
+
+    def done(self, key: str):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def run_with_retries(self, job: WatchedJob) -> bool:
+        for attempt in range(1, self.retries + 1):
+            try:
+                if job.on_timeout() is not False:
+                    return True
+                timed_print(f'Timeout action of {job.key} failed (attempt {attempt})')
+            except requests.exceptions.RequestException as e:
+                timed_print(f'Timeout action of {job.key} failed (attempt {attempt}): {e}')
+            if attempt < self.retries:
+                time.sleep(attempt)
+        return False
+
+    def check(self) -> list[WatchedJob]:
+        """Expires the overdue jobs and runs their timeout actions."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.is_overdue(now)]
+            for job in expired:
+                del self._jobs[job.key]
+        for job in expired:
+            timed_print(f'{job.key} exceeded its deadline')
+            if job.on_timeout and not self.run_with_retries(job):
+                job.timeout_failed = True
+                timed_print(f'Timeout action of {job.key} failed {self.retries} time(s), giving up')
+                if job.on_failure:
+                    job.on_failure()
+            job.expired.set()
+        return expired
+
+    def start(self):
+        def run():
+            while not self._stop.wait(self.interval):
+                self.check()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='acunetix-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+def abort_scan(api: AcunetixAPI, stream: ScanProgressStream, release: Callable[[], None] | None = None) -> bool:
+    """Aborts the scan, then stops waiting for it and frees its slot. A refused abort changes nothing."""
+    response = api.abort_scan(scan_id=stream.scan_id)
+    if response.status_code not in [200, 204]:
+        return False
+    timed_print(f'Scan {stream.scan_id} aborted')
+    stream.stop()
+    if release:
+        release()
+    return True
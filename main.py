@@ -2,22 +2,37 @@ from typing import NoReturn
 
 from api.base import AcunetixAPI
 from cli_arguments import CLI_ARGUMENTS
+from core import stages
 from core.main import Analyze
 
 
 def main() -> NoReturn:
+    if CLI_ARGUMENTS.command:
+        stages.run_stage(CLI_ARGUMENTS)
+        return
     api = AcunetixAPI(
         username=CLI_ARGUMENTS.username,
         password=CLI_ARGUMENTS.password,
         host=CLI_ARGUMENTS.host,
         port=CLI_ARGUMENTS.port,
         secure=CLI_ARGUMENTS.secure,
+        rate_limit=CLI_ARGUMENTS.rate_limit,
+        endpoint_rate_limits=dict(CLI_ARGUMENTS.endpoint_rate_limit),
     )
     analyze = Analyze(address=CLI_ARGUMENTS.address,
                       api=api,
                       proxy=CLI_ARGUMENTS.proxy,
                       output_file=CLI_ARGUMENTS.output_file,
-                      demo_mode=CLI_ARGUMENTS.demo_mode,)
+                      demo_mode=CLI_ARGUMENTS.demo_mode,
+                      result_source=CLI_ARGUMENTS.result_source,
+                      with_evidence=CLI_ARGUMENTS.with_evidence,
+                      formats=CLI_ARGUMENTS.formats,
+                      cache=stages.init_cache(CLI_ARGUMENTS),
+                      profiles=CLI_ARGUMENTS.profiles,
+                      report_templates=CLI_ARGUMENTS.report_templates,
+                      matrix_mode=CLI_ARGUMENTS.matrix_mode,
+                      max_parallel=CLI_ARGUMENTS.max_parallel,
+                      watchdog=stages.init_watchdog(CLI_ARGUMENTS),)
     analyze.run_scan_and_get_report()
 
 